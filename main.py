@@ -1,68 +1,220 @@
 import os
+import json
+import hashlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+MAX_FILE_SIZE = 1024 * 1024  # 1MB - larger files (e.g. app.log) are skipped
+BINARY_SNIFF_BYTES = 8192
+CACHE_FILE = '.files-content-cache.json'
 
 
 def should_skip_directory(dir_name):
     """Check if directory should be skipped"""
     skip_dirs = {
-        '.expo', 'node_modules', '.git', '__pycache__', 
+        '.expo', 'node_modules', '.git', '__pycache__',
         '.vscode', '.idea', 'dist', 'build', '.next',
         'coverage', '.nyc_output', 'logs', 'temp', 'tmp'
     }
     return dir_name in skip_dirs or dir_name.startswith('.')
 
 
-def find_and_extract_files(target_files, root_dir='.', output_file='files-content.txt', search_folders=None):
+def iter_matching_files(search_path, target_files):
+    """
+    Walk search_path with os.scandir and yield DirEntry objects whose name is in target_files
+
+    Entries are yielded in a stable (sorted) order so output is reproducible between runs.
+    """
+    stack = [search_path]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError as e:
+            print(f"Warning: Cannot read '{current}': {str(e)}")
+            continue
+
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if not should_skip_directory(entry.name):
+                    subdirs.append(entry.path)
+            elif entry.name in target_files and entry.is_file():
+                yield entry
+
+        # Reverse so directories are visited in sorted order (stack is LIFO)
+        stack.extend(reversed(subdirs))
+
+
+def load_cache(cache_file):
+    if cache_file and os.path.exists(cache_file):
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    return {}
+
+
+def save_cache(cache_file, cache):
+    if not cache_file:
+        return
+    temp_file = f"{cache_file}.tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(cache, f)
+    os.replace(temp_file, cache_file)
+
+
+def content_hash(content):
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def read_cached_content(output_file, cached):
+    """
+    Read a file's content back from the previous output_file using the cached offset/length
+
+    Returns None if the previous output is missing or no longer matches the cached hash.
+    """
+    try:
+        with open(output_file, 'rb') as f:
+            f.seek(cached['offset'])
+            content = f.read(cached['length']).decode('utf-8').replace('\r\n', '\n')
+    except (OSError, ValueError):
+        return None
+    return content if content_hash(content) == cached['sha256'] else None
+
+
+def read_file_entry(file_path, size, max_file_size):
+    """
+    Read one file and return a result dict with either 'content', 'skipped' or 'error'
+    """
+    if max_file_size and size > max_file_size:
+        return {"skipped": f"file too large ({size} bytes > {max_file_size})"}
+
+    try:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+
+        if b'\x00' in data[:BINARY_SNIFF_BYTES]:
+            return {"skipped": "binary file"}
+
+        # Normalise newlines like text-mode reads did
+        return {"content": data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')}
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def write_result(out_file, file_path, result):
+    """
+    Write one file's section to out_file and return its cache metadata
+
+    Content itself is not cached: only where it landed in output_file (offset, length)
+    and its hash, so the next run can copy it back out of the previous output.
+    """
+    # Write file path
+    out_file.write(f"{'='*60}\n")
+    out_file.write(f"FILE: {file_path}\n")
+    out_file.write(f"{'='*60}\n\n")
+
+    meta = {key: result[key] for key in ('mtime_ns', 'size', 'max_file_size')}
+    if 'content' in result:
+        out_file.flush()
+        offset = out_file.tell()
+        out_file.write(result['content'])
+        out_file.flush()
+        meta.update(offset=offset, length=out_file.tell() - offset, sha256=content_hash(result['content']))
+        out_file.write('\n\n')
+        print(f"Processed: {file_path}")
+    elif 'skipped' in result:
+        meta['skipped'] = result['skipped']
+        out_file.write(f"SKIPPED: {result['skipped']}\n\n")
+        print(f"Skipped {file_path}: {result['skipped']}")
+    else:
+        meta['error'] = result['error']
+        out_file.write(f"ERROR reading file: {result['error']}\n\n")
+        print(f"Error processing {file_path}: {result['error']}")
+    return meta
+
+
+def find_and_extract_files(target_files, root_dir='.', output_file='files-content.txt', search_folders=None,
+                           max_file_size=MAX_FILE_SIZE, max_workers=8, cache_file=CACHE_FILE):
     """
     Search for specified files and extract their content to files-content.txt
-    
+
     Args:
         target_files: List of file names to search for
         root_dir: Root directory to start search from
         output_file: Output file to write results
         search_folders: List of specific folder names to search in (e.g., ['user-frontend', 'backend'])
                        If None, searches all folders
+        max_file_size: Skip files larger than this many bytes (None or 0 disables the limit)
+        max_workers: Number of threads used to read files concurrently
+        cache_file: JSON file caching per-file metadata (mtime, size and where the content
+                    sits in the previous output_file) so unchanged files are not re-read
+                    on later runs (None disables caching)
     """
-    
-    with open(output_file, 'w', encoding='utf-8') as out_file:
-        # If specific folders are provided, only search in those
-        if search_folders:
-            search_paths = [os.path.join(root_dir, folder) for folder in search_folders]
-        else:
-            # Search all folders in root_dir
-            search_paths = [root_dir]
-        
+    target_files = set(target_files)
+    cache = load_cache(cache_file)
+    new_cache = {}
+    # Build the new output beside the old one: unchanged files are copied out of it
+    temp_output = f"{output_file}.tmp"
+
+    # If specific folders are provided, only search in those
+    if search_folders:
+        search_paths = [os.path.join(root_dir, folder) for folder in search_folders]
+    else:
+        # Search all folders in root_dir
+        search_paths = [root_dir]
+
+    def load_entry(entry):
+        stat = entry.stat()
+        result = None
+        cached = cache.get(os.path.abspath(entry.path))
+        if (cached and cached['mtime_ns'] == stat.st_mtime_ns and cached['size'] == stat.st_size
+                and cached['max_file_size'] == max_file_size):
+            if 'offset' in cached:
+                content = read_cached_content(output_file, cached)
+                if content is not None:
+                    result = {"content": content}
+            else:
+                result = {key: cached[key] for key in ('skipped', 'error') if key in cached}
+        if result is None:
+            result = read_file_entry(entry.path, stat.st_size, max_file_size)
+        result.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size, max_file_size=max_file_size)
+        return entry.path, result
+
+    # Keep only a small window of reads in flight so memory stays bounded on large trees
+    window = max_workers * 2
+
+    with open(temp_output, 'w', encoding='utf-8') as out_file, \
+            ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+
+        def write_next():
+            file_path, result = pending.popleft().result()
+            new_cache[os.path.abspath(file_path)] = write_result(out_file, file_path, result)
+
         for search_path in search_paths:
             # Check if the search path exists
             if not os.path.exists(search_path):
                 print(f"Warning: Path '{search_path}' does not exist. Skipping...")
                 continue
-            
+
             print(f"Searching in: {search_path}")
-            
-            for root, dirs, files in os.walk(search_path):
-                # Remove directories to skip from dirs list (modifies os.walk behavior)
-                dirs[:] = [d for d in dirs if not should_skip_directory(d)]
-                
-                for file in files:
-                    if file in target_files:
-                        file_path = os.path.join(root, file)
-                        try:
-                            # Write file path
-                            out_file.write(f"{'='*60}\n")
-                            out_file.write(f"FILE: {file_path}\n")
-                            out_file.write(f"{'='*60}\n\n")
-                            
-                            # Read and write file content
-                            with open(file_path, 'r', encoding='utf-8') as f:
-                                content = f.read()
-                                out_file.write(content)
-                                out_file.write('\n\n')
-                            
-                            print(f"Processed: {file_path}")
-                            
-                        except Exception as e:
-                            out_file.write(f"ERROR reading file: {str(e)}\n\n")
-                            print(f"Error processing {file_path}: {str(e)}")
+
+            # Reads run concurrently; results are written in walk order from the left
+            for entry in iter_matching_files(search_path, target_files):
+                pending.append(executor.submit(load_entry, entry))
+                if len(pending) >= window:
+                    write_next()
+
+            while pending:
+                write_next()
+
+    os.replace(temp_output, output_file)
+    save_cache(cache_file, new_cache)
 
 
 # Usage example
@@ -86,16 +238,16 @@ if __name__ == "__main__":
         'documentation.md',
         'README.md',
     ]
-    
+
     # Option 1: Search only in 'user-frontend' and 'backend' folders
     folders_to_search = ['backend']
     # find_and_extract_files(files_to_find, search_folders=folders_to_search)
     find_and_extract_files(files_to_find)
-    
+
     # Option 2: Search in all folders (pass None or omit search_folders parameter)
     # find_and_extract_files(files_to_find)
-    
+
     # Option 3: Search in a single folder
     # find_and_extract_files(files_to_find, search_folders=['user-frontend'])
-    
+
     print("File extraction completed. Check files-content.txt for results.")
@@ -52,8 +52,12 @@ def build_executable():
         '--hidden-import=apscheduler.schedulers.background',
         '--hidden-import=apscheduler.triggers.cron',
         '--hidden-import=requests',
+        '--hidden-import=httpx',
+        '--hidden-import=h2',
         '--hidden-import=zipfile',
         '--hidden-import=shutil',
+        # Multi-worker mode: uvicorn workers import the app as "main:app"
+        '--hidden-import=main',
         
         # Collect all packages
         '--collect-all=uvicorn',
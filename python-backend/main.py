@@ -1,34 +1,259 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
-import uvicorn
+import time
+from contextlib import contextmanager, asynccontextmanager
+
+# ===== IMPORT TIMING (STARTUP PROFILING) =====
+# Heavy third-party imports dominate cold start of the PyInstaller build.
+# Each figure excludes modules already loaded by an earlier group.
+module_started = time.perf_counter()
+import_timings = {}
+
+
+@contextmanager
+def timed_import(name):
+    started = time.perf_counter()
+    yield
+    import_timings[name] = round((time.perf_counter() - started) * 1000, 1)
+
+
+with timed_import('fastapi'):
+    from fastapi import FastAPI, HTTPException, Request
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import FileResponse, Response, StreamingResponse
+    from fastapi.concurrency import run_in_threadpool
+    import anyio
+    from pydantic import BaseModel
+with timed_import('uvicorn'):
+    import uvicorn
+with timed_import('apscheduler'):
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.events import EVENT_JOB_SUBMITTED, EVENT_JOB_EXECUTED, EVENT_JOB_ERROR, EVENT_JOB_MISSED
+with timed_import('requests'):
+    import requests
+with timed_import('openpyxl'):
+    from openpyxl import load_workbook, Workbook
+with timed_import('pandas'):
+    import pandas as pd
+with timed_import('httpx'):
+    try:
+        import httpx
+    except ImportError:
+        # Optional: only needed when download_client is "httpx"
+        httpx = None
+
 import json
 import os
+import sys
+import argparse
+import atexit
+import multiprocessing
 from datetime import datetime, timedelta
 import logging
-from logging.handlers import RotatingFileHandler
-from apscheduler.schedulers.background import BackgroundScheduler
-import requests
-from openpyxl import load_workbook, Workbook
-from typing import Optional
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+from queue import SimpleQueue
+from collections import defaultdict, deque, Counter
+from typing import Optional, List, Literal
 import zipfile
-import pandas as pd
+import csv
+import io
+import gzip
+import zlib
+import shutil
+import hashlib
+import hmac
+import secrets
+from urllib.parse import parse_qs
+import threading
+import asyncio
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+
+# ===== DEPLOYMENT MODE =====
+# Set by the launcher before uvicorn spawns workers; every worker sees it
+worker_count = int(os.environ.get('HOMESTOCK_WORKERS', '1'))
+multi_worker = worker_count > 1
+
+# Server mode exposes the API beyond localhost: every request needs the shared
+# token and process_excel is confined to downloads_dir
+server_mode = os.environ.get('HOMESTOCK_SERVER_MODE') == '1'
+api_token = os.environ.get('HOMESTOCK_API_TOKEN') or None
+if server_mode and not api_token:
+    raise RuntimeError("HOMESTOCK_API_TOKEN must be set in server mode")
+
+# Packaged Electron pages send Origin "null"; the dev renderer runs on :3000
+DEFAULT_SERVER_CORS_ORIGINS = "null,http://localhost:3000"
+server_cors_origins = [
+    origin.strip()
+    for origin in os.environ.get('HOMESTOCK_CORS_ORIGINS', DEFAULT_SERVER_CORS_ORIGINS).split(',')
+    if origin.strip()
+]
+
+
+# ===== APP LIFESPAN =====
+@asynccontextmanager
+async def lifespan(app):
+    lifespan_started = time.perf_counter()
+    scheduler.start()
+    if multi_worker:
+        shared_event_log.start()
+    coordinator.start()
+    await open_http_client()
+    record_startup_timings(lifespan_started)
+    yield
+    await close_http_client()
+    coordinator.stop()
+    if multi_worker:
+        shared_event_log.stop()
+    scheduler.shutdown(wait=False)
 
 
 # ===== FASTAPI APP INITIALIZATION =====
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+# EventSource cannot send headers, so /api/events takes a short-lived ticket in
+# the query string instead of the token itself (query strings end up in access logs)
+EVENT_TICKET_TTL_SECONDS = 30
+
+
+def sign_event_ticket(payload):
+    return hmac.new(api_token.encode(), payload.encode(), hashlib.sha256).hexdigest()
+
+
+def issue_event_ticket():
+    """Signed "<expiry>.<nonce>.<signature>" ticket, verifiable by any worker"""
+    payload = f"{int(time.time()) + EVENT_TICKET_TTL_SECONDS}.{secrets.token_urlsafe(8)}"
+    return f"{payload}.{sign_event_ticket(payload)}"
+
+
+def verify_event_ticket(ticket):
+    payload, _, signature = ticket.rpartition('.')
+    expires = payload.split('.', 1)[0]
+    if not payload or not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(signature, sign_event_ticket(payload))
+
+
+class TokenAuthMiddleware:
+    """Rejects requests without the shared API token (server mode only).
+
+    The token is accepted as "Authorization: Bearer <token>". The event stream
+    alone also accepts a ?ticket= from POST /api/events/ticket.
+    """
+    # Health check used by the renderer's connection test; returns no data
+    public_paths = {"/"}
+    ticket_paths = {"/api/events"}
+
+    def __init__(self, app, token):
+        self.app = app
+        self.token = token
 
+    def authorized(self, scope):
+        headers = dict(scope['headers'])
+        supplied = headers.get(b'authorization', b'').decode('latin-1').removeprefix('Bearer ').strip()
+        if supplied:
+            return hmac.compare_digest(supplied.encode(), self.token.encode())
+        if scope['path'] in self.ticket_paths:
+            ticket = parse_qs(scope.get('query_string', b'').decode('latin-1')).get('ticket', [''])[0]
+            return verify_event_ticket(ticket)
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] == 'OPTIONS' or scope['path'] in self.public_paths:
+            await self.app(scope, receive, send)
+            return
+        
+        if not self.authorized(scope):
+            response = Response(
+                json.dumps({"detail": "Missing or invalid API token"}),
+                status_code=401,
+                media_type='application/json',
+                headers={"WWW-Authenticate": "Bearer"}
+            )
+            await response(scope, receive, send)
+            return
+        
+        await self.app(scope, receive, send)
+
+
+if server_mode:
+    app.add_middleware(TokenAuthMiddleware, token=api_token)
+
+# Added last so it is outermost: preflights and 401s still carry CORS headers
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=server_cors_origins if server_mode else ["*"],
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
 # ===== SCHEDULER INITIALIZATION =====
+# Started in lifespan; recurring jobs are only registered by the leader process
 scheduler = BackgroundScheduler()
-scheduler.start()
+
+
+# ===== CROSS-PROCESS FILE LOCK =====
+class FileLock:
+    """Exclusive lock backed by an OS file lock; also serialises threads in-process"""
+    def __init__(self, path):
+        self.path = path
+        self.thread_lock = threading.Lock()
+        self.handle = None
+
+    def acquire(self, blocking=True):
+        if not self.thread_lock.acquire(blocking):
+            return False
+        
+        handle = open(self.path, 'a+')
+        try:
+            if os.name == 'nt':
+                handle.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        if not blocking:
+                            raise
+                        time.sleep(0.05)
+            else:
+                flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+                fcntl.flock(handle.fileno(), flags)
+        except OSError:
+            handle.close()
+            self.thread_lock.release()
+            return False
+        
+        self.handle = handle
+        return True
+
+    def release(self):
+        handle, self.handle = self.handle, None
+        try:
+            if os.name == 'nt':
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        finally:
+            handle.close()
+            self.thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+def write_json_atomic(path, data):
+    temp_file = f"{path}.{os.getpid()}.tmp"
+    with open(temp_file, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(temp_file, path)
 
 
 # ===== IMPROVED LOGGING SETUP WITH IMMEDIATE FLUSH =====
@@ -44,11 +269,29 @@ class ImmediateFlushHandler(RotatingFileHandler):
         self.flush()  # Force immediate write to disk
 
 
+# Serialises writes, rotation and /api/logs reads of app.log across workers
+log_file_lock = FileLock(f"{log_file}.lock")
+
+
+class SharedRotatingFileHandler(ImmediateFlushHandler):
+    """Multi-worker safe rotation: each record is appended under log_file_lock
+    and the file is closed again, so whichever worker crosses maxBytes can
+    rename it without other processes holding it open."""
+    def emit(self, record):
+        with log_file_lock:
+            super().emit(record)
+            if self.stream:
+                self.stream.close()
+                self.stream = None
+
+
 # Setup handler with immediate flush
-handler = ImmediateFlushHandler(
+handler_class = SharedRotatingFileHandler if multi_worker else ImmediateFlushHandler
+handler = handler_class(
     log_file,
     maxBytes=10*1024*1024,  # 10MB
-    backupCount=5
+    backupCount=5,
+    delay=multi_worker
 )
 handler.setLevel(logging.INFO)
 formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
@@ -56,11 +299,288 @@ handler.setFormatter(formatter)
 
 # Configure root logger
 logger = logging.getLogger()
-logger.addHandler(handler)
 logger.setLevel(logging.INFO)
 
+if multi_worker:
+    # The shared handler waits on a cross-process lock; hand records to a
+    # listener thread so logging from the event loop never blocks on it
+    log_listener = QueueListener(SimpleQueue(), handler, respect_handler_level=True)
+    root_handler = QueueHandler(log_listener.queue)
+    log_listener.start()
+    # Drain records still queued when the worker exits
+    atexit.register(log_listener.stop)
+else:
+    log_listener = None
+    root_handler = handler
+
 # Remove default handlers to avoid duplication
-logger.handlers = [handler]
+logger.handlers = [root_handler]
+
+
+# ===== EVENT STREAM (SERVER-SENT EVENTS) =====
+class EventBus:
+    """Fan out events from any thread to every connected /api/events client"""
+    def __init__(self, max_queue=1000):
+        self.max_queue = max_queue
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        # Optional cross-process relay (SharedEventLog) used in multi-worker mode
+        self.relay = None
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=self.max_queue)
+        with self.lock:
+            self.subscribers.add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, queue):
+        with self.lock:
+            self.subscribers = {sub for sub in self.subscribers if sub[1] is not queue}
+
+    def publish(self, event_type, **data):
+        event = {"type": event_type, "timestamp": datetime.now().isoformat(), **data}
+        if self.relay:
+            self.relay.append(event)
+        self.deliver(event)
+
+    def deliver(self, event):
+        """Hand an event to subscribers connected to this process only"""
+        with self.lock:
+            subscribers = list(self.subscribers)
+        
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:
+                # Subscriber's loop already closed
+                self.unsubscribe(queue)
+
+    @staticmethod
+    def _offer(queue, event):
+        # Slow clients lose the oldest events rather than blocking publishers
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+
+event_bus = EventBus()
+
+
+class EventBusLogHandler(logging.Handler):
+    """Push formatted log lines to the event stream so the Logs screen needn't poll"""
+    def emit(self, record):
+        try:
+            event_bus.publish("log", line=self.format(record) + "\n", level=record.levelname)
+        except Exception:
+            self.handleError(record)
+
+
+event_log_handler = EventBusLogHandler()
+event_log_handler.setLevel(logging.INFO)
+event_log_handler.setFormatter(formatter)
+logger.addHandler(event_log_handler)
+
+
+def publish_scheduler_event(event):
+    state = {
+        EVENT_JOB_SUBMITTED: "fired",
+        EVENT_JOB_EXECUTED: "completed",
+        EVENT_JOB_ERROR: "failed",
+        EVENT_JOB_MISSED: "missed",
+    }.get(event.code, "unknown")
+    job = scheduler.get_job(event.job_id)
+    event_bus.publish(
+        "scheduler_job",
+        job_id=event.job_id,
+        state=state,
+        next_run=str(job.next_run_time) if job else None
+    )
+
+
+scheduler.add_listener(publish_scheduler_event, EVENT_JOB_SUBMITTED | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED)
+
+
+# ===== PROFILING (OPT-IN) =====
+# Enabled with --profile or HOMESTOCK_PROFILING=1; costs nothing otherwise
+profiling_enabled = False
+startup_timings = {}
+
+
+def record_startup_timings(lifespan_started):
+    now = time.perf_counter()
+    startup_timings.update(
+        imports_ms=import_timings,
+        module_init_ms=round((lifespan_started - module_started) * 1000, 1),
+        lifespan_ms=round((now - lifespan_started) * 1000, 1),
+        total_ms=round((now - module_started) * 1000, 1)
+    )
+    if profiling_enabled:
+        breakdown = ", ".join(f"{name} {ms}ms" for name, ms in import_timings.items())
+        logging.info(f" Startup took {startup_timings['total_ms']}ms (imports: {breakdown})")
+
+
+class RouteLatencyRecorder:
+    """Keeps the most recent latencies per route for percentile reporting"""
+    def __init__(self, max_samples=1000):
+        self.samples = defaultdict(lambda: deque(maxlen=max_samples))
+        self.counts = Counter()
+        self.lock = threading.Lock()
+
+    def record(self, route, seconds):
+        with self.lock:
+            self.samples[route].append(seconds * 1000)
+            self.counts[route] += 1
+
+    def summary(self):
+        with self.lock:
+            snapshot = {route: sorted(values) for route, values in self.samples.items()}
+            counts = dict(self.counts)
+        
+        def percentile(values, pct):
+            return round(values[min(len(values) - 1, int(len(values) * pct / 100))], 2)
+        
+        return {
+            route: {
+                "count": counts[route],
+                "p50_ms": percentile(values, 50),
+                "p90_ms": percentile(values, 90),
+                "p99_ms": percentile(values, 99),
+                "max_ms": round(values[-1], 2)
+            }
+            for route, values in sorted(snapshot.items())
+        }
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+            self.counts.clear()
+
+
+latency_recorder = RouteLatencyRecorder()
+
+
+UNMATCHED_ROUTE_KEY = "<unmatched>"
+
+
+class LatencyMiddleware:
+    """ASGI middleware timing each request until its response body is complete"""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        
+        started = time.perf_counter()
+        streaming = False
+        
+        async def watch_send(message):
+            nonlocal streaming
+            if message['type'] == 'http.response.start':
+                headers = dict(message.get('headers', []))
+                # SSE connections stay open for minutes; they are not request latency
+                streaming = headers.get(b'content-type', b'').startswith(b'text/event-stream')
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, watch_send)
+        finally:
+            if not streaming:
+                latency_recorder.record(self.route_key(scope), time.perf_counter() - started)
+
+    @staticmethod
+    def route_key(scope):
+        """Key by path template; 404s and unknown methods share one bucket so keys stay bounded"""
+        # The router stores the matched route in scope, giving the path template
+        route = scope.get('route')
+        path = getattr(route, 'path', None)
+        methods = getattr(route, 'methods', None)
+        if path is None or (methods is not None and scope['method'] not in methods):
+            return UNMATCHED_ROUTE_KEY
+        return f"{scope['method']} {path}"
+
+
+class SamplingProfiler:
+    """Periodically samples the stacks of all threads via sys._current_frames()"""
+    def __init__(self, seconds, interval_ms):
+        self.seconds = seconds
+        self.interval_ms = interval_ms
+        self.frames = []
+        self.frame_ids = {}
+        self.samples = defaultdict(list)
+        self.thread_names = {}
+
+    def frame_id(self, code):
+        key = (code.co_filename, code.co_name, code.co_firstlineno)
+        if key not in self.frame_ids:
+            self.frame_ids[key] = len(self.frames)
+            self.frames.append({"name": code.co_name, "file": code.co_filename, "line": code.co_firstlineno})
+        return self.frame_ids[key]
+
+    def run(self):
+        own_ident = threading.get_ident()
+        deadline = time.perf_counter() + self.seconds
+        while time.perf_counter() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self.frame_id(frame.f_code))
+                    frame = frame.f_back
+                stack.reverse()
+                self.samples[ident].append(stack)
+                self.thread_names[ident] = names.get(ident, str(ident))
+            time.sleep(self.interval_ms / 1000)
+        return self
+
+    def to_speedscope(self):
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": "HomeStock backend",
+            "exporter": "homestock-sampling-profiler",
+            "shared": {"frames": self.frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": self.thread_names[ident],
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": len(stacks) * self.interval_ms,
+                    "samples": stacks,
+                    "weights": [self.interval_ms] * len(stacks)
+                }
+                for ident, stacks in self.samples.items()
+            ]
+        }
+
+    def to_collapsed(self):
+        """Brendan Gregg collapsed-stack text, one line per unique stack"""
+        counts = Counter()
+        for ident, stacks in self.samples.items():
+            for stack in stacks:
+                names = [self.thread_names[ident]] + [
+                    f"{os.path.basename(self.frames[i]['file'])}:{self.frames[i]['name']}" for i in stack
+                ]
+                counts[";".join(names)] += 1
+        return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+profiler_lock = threading.Lock()
+
+
+def enable_profiling():
+    """Turn on request timing; must run before the app serves its first request"""
+    global profiling_enabled
+    if not profiling_enabled:
+        profiling_enabled = True
+        app.add_middleware(LatencyMiddleware)
+
+
+if os.environ.get('HOMESTOCK_PROFILING') == '1':
+    enable_profiling()
 
 
 # ===== DIRECTORY SETUP =====
@@ -71,6 +591,106 @@ os.makedirs(processed_dir, exist_ok=True)
 
 settings_file = os.path.join(os.path.dirname(__file__), '..', 'settings.json')
 
+# Lock files, leader state and the event relay shared by all worker processes
+state_dir = os.path.join(os.path.dirname(__file__), '..', 'state')
+os.makedirs(state_dir, exist_ok=True)
+scheduler_state_file = os.path.join(state_dir, 'scheduler_state.json')
+
+
+# ===== SHARED STATE (CROSS-PROCESS LOCKS) =====
+settings_lock = FileLock(os.path.join(state_dir, 'settings.lock'))
+
+
+class SharedEventLog:
+    """Append-only JSONL file that relays events between worker processes"""
+    max_bytes = 5 * 1024 * 1024
+    poll_seconds = 0.5
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = FileLock(f"{path}.lock")
+        self.offset = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.pending = SimpleQueue()
+        self.writer = None
+
+    def append(self, event):
+        # Publishers include the event loop: only enqueue, the writer thread
+        # takes the file lock and does the append
+        self.pending.put(json.dumps({**event, "origin": os.getpid()}) + "\n")
+
+    def write_pending(self):
+        while True:
+            lines = [self.pending.get()]
+            while not self.pending.empty():
+                lines.append(self.pending.get())
+            stopping = None in lines
+            lines = [line for line in lines if line is not None]
+            try:
+                if lines:
+                    with self.lock:
+                        with open(self.path, 'a', encoding='utf-8') as f:
+                            f.write(''.join(lines))
+            except OSError:
+                # Never log from here - log records are themselves relayed events
+                pass
+            if stopping:
+                return
+
+    def start(self):
+        self.offset = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        event_bus.relay = self
+        self.stop_event.clear()
+        self.writer = threading.Thread(target=self.write_pending, name='event-relay-writer', daemon=True)
+        self.writer.start()
+        self.thread = threading.Thread(target=self.run, name='event-relay', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        event_bus.relay = None
+        self.stop_event.set()
+        self.pending.put(None)
+        for thread in (self.writer, self.thread):
+            if thread:
+                thread.join(timeout=2)
+
+    def run(self):
+        while not self.stop_event.wait(self.poll_seconds):
+            try:
+                self.poll()
+            except Exception:
+                # Never log from here - log records are themselves relayed events
+                pass
+
+    def poll(self):
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if size < self.offset:
+            # Leader truncated the log
+            self.offset = 0
+        if size == self.offset:
+            return
+        
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+        
+        # Only consume complete lines; a partial write is picked up next poll
+        complete = data.rfind(b'\n') + 1
+        self.offset += complete
+        for raw in data[:complete].splitlines():
+            event = json.loads(raw)
+            if event.pop('origin', None) != os.getpid():
+                event_bus.deliver(event)
+
+    def truncate_if_large(self):
+        with self.lock:
+            if os.path.exists(self.path) and os.path.getsize(self.path) > self.max_bytes:
+                open(self.path, 'w').close()
+
+
+shared_event_log = SharedEventLog(os.path.join(state_dir, 'events.jsonl'))
+
 
 # ===== PYDANTIC MODELS =====
 class DownloadRequest(BaseModel):
@@ -84,31 +704,67 @@ class ProcessRequest(BaseModel):
     file_path: str
 
 
+class BulkDownloadRequest(BaseModel):
+    file_type: str
+    filenames: List[str]
+
+
 class SettingsModel(BaseModel):
     download_path: str
     processed_path: str
     scheduler_time: str
     scheduler_enabled: bool
     scheduler_manual_date: Optional[str] = None
+    processed_cache_max_mb: int = 500
+    storage_compaction_enabled: bool = True
+    storage_compact_after_days: int = 7
+    storage_compact_interval_hours: int = 6
+    storage_retention_days: int = 0
+    storage_max_mb: int = 0
+    quarantine_retention_days: int = 7
+    download_client: Literal["requests", "httpx"] = "requests"
+    download_concurrency: int = 8
 
 
 # ===== SETTINGS FUNCTIONS =====
+DEFAULT_SETTINGS = {
+    "download_path": "downloads",
+    "processed_path": "processed",
+    "scheduler_time": "18:45",
+    "scheduler_enabled": False,
+    "scheduler_manual_date": None,
+    "processed_cache_max_mb": 500,
+    "storage_compaction_enabled": True,
+    "storage_compact_after_days": 7,
+    "storage_compact_interval_hours": 6,
+    "storage_retention_days": 0,
+    "storage_max_mb": 0,
+    "quarantine_retention_days": 7,
+    "download_client": "requests",
+    "download_concurrency": 8
+}
+
+
 def load_settings():
+    settings = dict(DEFAULT_SETTINGS)
     if os.path.exists(settings_file):
         with open(settings_file, 'r') as f:
-            return json.load(f)
-    return {
-        "download_path": "downloads",
-        "processed_path": "processed",
-        "scheduler_time": "18:45",
-        "scheduler_enabled": False,
-        "scheduler_manual_date": None
-    }
+            settings.update(json.load(f))
+    return settings
 
 
 def save_settings_file(settings):
-    with open(settings_file, 'w') as f:
-        json.dump(settings, f, indent=2)
+    with settings_lock:
+        write_json_atomic(settings_file, settings)
+
+
+def update_settings(**changes):
+    """Read-modify-write settings under the shared lock"""
+    with settings_lock:
+        settings = load_settings()
+        settings.update(changes)
+        write_json_atomic(settings_file, settings)
+    return settings
 
 
 # ===== DOWNLOAD URL GENERATOR (FIXED URLS) =====
@@ -133,58 +789,611 @@ def get_download_url(date_obj, job_type):
     return url
 
 
+# ===== DOWNLOAD VALIDATION + QUARANTINE =====
+# Expected payload per job type. NSE/BSE answer captcha and error pages with
+# HTTP 200, so a response is only accepted once its content matches this.
+DOWNLOAD_SCHEMAS = {
+    "NSE Bhavcopy": {
+        "archive": True,
+        "required_columns": set(),
+        "min_rows": 1
+    },
+    "NSE Delivery": {
+        "archive": False,
+        "required_columns": {"SYMBOL", "SERIES", "DATE1", "CLOSE_PRICE", "DELIV_QTY"},
+        "min_rows": 100
+    },
+    "BSE Bhavcopy": {
+        "archive": True,
+        "required_columns": {"SC_CODE", "SC_NAME", "CLOSE"},
+        "min_rows": 100
+    },
+}
+
+MAX_REFETCH_ATTEMPTS = 3
+REFETCH_DELAY_MINUTES = 30
+
+quarantine_dir = os.path.join(downloads_dir, 'quarantine')
+os.makedirs(quarantine_dir, exist_ok=True)
+quarantine_index_file = os.path.join(quarantine_dir, 'index.json')
+quarantine_lock = FileLock(os.path.join(state_dir, 'quarantine.lock'))
+
+
+def looks_like_html(head):
+    head = head.lstrip().lower()
+    return head.startswith(b'<') or b'<html' in head or b'<!doctype' in head
+
+
+def check_csv_stream(stream, schema, name):
+    """Validate header and row count of a text stream, returns (ok, reason, rows)"""
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if not header:
+        return False, f"{name} is empty", 0
+    
+    columns = {column.strip().upper() for column in header}
+    missing = schema['required_columns'] - columns
+    if missing:
+        return False, f"{name} is missing columns: {', '.join(sorted(missing))}", 0
+    
+    rows = sum(1 for row in reader if any(cell.strip() for cell in row))
+    if rows < schema['min_rows']:
+        return False, f"{name} has {rows} rows, expected at least {schema['min_rows']}", rows
+    
+    return True, None, rows
+
+
+def validate_download(file_path, job_type, content_type=None, display_name=None):
+    """Check a freshly downloaded payload against DOWNLOAD_SCHEMAS, returns (ok, reason)
+
+    display_name is the name used in reasons, since file_path is usually the hidden .part file.
+    """
+    schema = DOWNLOAD_SCHEMAS.get(job_type)
+    if schema is None:
+        return True, None
+    
+    if os.path.getsize(file_path) == 0:
+        return False, "empty response"
+    
+    with open(file_path, 'rb') as f:
+        head = f.read(1024)
+    if (content_type and 'html' in content_type.lower()) or looks_like_html(head):
+        return False, f"received an HTML page instead of data (Content-Type: {content_type})"
+    
+    if not schema['archive']:
+        with open(file_path, 'r', encoding='utf-8-sig', errors='replace', newline='') as f:
+            ok, reason, rows = check_csv_stream(f, schema, display_name or os.path.basename(file_path))
+        return ok, reason
+    
+    if not zipfile.is_zipfile(file_path):
+        return False, "not a valid ZIP archive"
+    
+    try:
+        with zipfile.ZipFile(file_path, 'r') as zip_ref:
+            bad_member = zip_ref.testzip()
+            if bad_member:
+                return False, f"corrupt ZIP member: {bad_member}"
+            
+            csv_members = [m for m in zip_ref.namelist() if m.lower().endswith('.csv')]
+            if not csv_members:
+                return False, "ZIP contains no CSV files"
+            
+            # Every member must parse; the schema columns only need to appear in one
+            reasons = []
+            for member in csv_members:
+                with zip_ref.open(member) as raw:
+                    stream = io.TextIOWrapper(raw, encoding='utf-8-sig', errors='replace', newline='')
+                    ok, reason, rows = check_csv_stream(stream, schema, member)
+                if ok:
+                    return True, None
+                reasons.append(reason)
+            return False, "; ".join(reasons)
+    except (zipfile.BadZipFile, zipfile.LargeZipFile, OSError) as e:
+        return False, f"unreadable ZIP: {str(e)}"
+
+
+def load_quarantine_index():
+    if os.path.exists(quarantine_index_file):
+        try:
+            with open(quarantine_index_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            logging.warning("Quarantine index unreadable, starting fresh")
+    return {}
+
+
+def quarantine_key(date_str, job_type):
+    return f"{job_type}|{date_str}"
+
+
+def next_refetch_time(attempts):
+    """When to retry after `attempts` failures, or None once attempts are exhausted"""
+    if attempts >= MAX_REFETCH_ATTEMPTS:
+        return None
+    return (datetime.now() + timedelta(minutes=REFETCH_DELAY_MINUTES * attempts)).isoformat()
+
+
+def quarantine_download(temp_path, date_str, job_type, filename, reason):
+    """Move a rejected payload aside and record when to re-fetch it, returns the entry.
+
+    Pending re-fetches live only in the quarantine index; the scheduler leader
+    picks up due entries (see run_due_refetches), so they survive restarts.
+    """
+    quarantined_name = f"{date_str}_{job_type.replace(' ', '_')}_{filename}"
+    os.replace(temp_path, os.path.join(quarantine_dir, quarantined_name))
+    
+    with quarantine_lock:
+        index = load_quarantine_index()
+        entry = index.get(quarantine_key(date_str, job_type), {"attempts": 0})
+        entry.update(
+            date=date_str,
+            job_type=job_type,
+            file=quarantined_name,
+            reason=reason,
+            attempts=entry['attempts'] + 1,
+            quarantined_at=datetime.now().isoformat()
+        )
+        entry['next_refetch'] = next_refetch_time(entry['attempts'])
+        
+        index[quarantine_key(date_str, job_type)] = entry
+        write_json_atomic(quarantine_index_file, index)
+    
+    return entry
+
+
+def clear_quarantine(date_str, job_type):
+    """Forget a quarantined payload once a valid copy has been downloaded"""
+    with quarantine_lock:
+        index = load_quarantine_index()
+        entry = index.pop(quarantine_key(date_str, job_type), None)
+        if entry:
+            write_json_atomic(quarantine_index_file, index)
+            try:
+                os.remove(os.path.join(quarantine_dir, entry['file']))
+            except OSError:
+                pass
+            logging.info(f"Cleared quarantine for {job_type} {date_str}")
+
+
+def purge_quarantine(max_age_days=0):
+    """Drop exhausted entries (no re-fetch left) quarantined more than max_age_days ago
+
+    Returns the number of entries removed along with their payloads.
+    """
+    cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat()
+    with quarantine_lock:
+        index = load_quarantine_index()
+        expired = [
+            key for key, entry in index.items()
+            if entry.get('next_refetch') is None and entry['quarantined_at'] <= cutoff
+        ]
+        for key in expired:
+            entry = index.pop(key)
+            try:
+                os.remove(os.path.join(quarantine_dir, entry['file']))
+            except OSError:
+                pass
+        if expired:
+            write_json_atomic(quarantine_index_file, index)
+    
+    if expired:
+        logging.info(f"Purged {len(expired)} exhausted quarantine entries")
+    return len(expired)
+
+
+def run_due_refetches():
+    """Leader only: start a re-fetch for every quarantine entry whose time has come.
+
+    Claiming pushes next_refetch forward by one delay as a lease, so an entry
+    is retried again if the leader dies mid-download.
+    """
+    now = datetime.now().isoformat()
+    with quarantine_lock:
+        index = load_quarantine_index()
+        due = [entry for entry in index.values() if entry.get('next_refetch') and entry['next_refetch'] <= now]
+        lease = (datetime.now() + timedelta(minutes=REFETCH_DELAY_MINUTES)).isoformat()
+        for entry in due:
+            entry['next_refetch'] = lease
+        if due:
+            write_json_atomic(quarantine_index_file, index)
+    
+    for entry in due:
+        # One-off job so the download runs on a scheduler thread, not the coordinator
+        scheduler.add_job(
+            refetch_download_task,
+            args=[entry['date'], entry['job_type']],
+            id=f"refetch_{entry['job_type'].replace(' ', '_')}_{entry['date']}",
+            replace_existing=True
+        )
+
+
+def refetch_download_task(date_str, job_type):
+    logging.info(f"Re-fetching quarantined download: {job_type} {date_str}")
+    with quarantine_lock:
+        entry = load_quarantine_index().get(quarantine_key(date_str, job_type))
+    claimed_at = entry['quarantined_at'] if entry else None
+    
+    success, message = download_file(date_str, job_type)
+    if success:
+        return
+    
+    # An invalid payload re-quarantines itself; other failures (404, network)
+    # leave the entry untouched and still count as an attempt
+    with quarantine_lock:
+        index = load_quarantine_index()
+        entry = index.get(quarantine_key(date_str, job_type))
+        if entry and entry['quarantined_at'] == claimed_at:
+            entry['attempts'] += 1
+            entry['reason'] = message
+            entry['next_refetch'] = next_refetch_time(entry['attempts'])
+            write_json_atomic(quarantine_index_file, index)
+
+
 # ===== FILE DOWNLOAD FUNCTION (WITH RETRY LOGIC) =====
+DOWNLOAD_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+}
+DOWNLOAD_TIMEOUT = 30
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+PROGRESS_EVENT_BYTES = 256 * 1024
+
+
+def report_progress(date_str, job_type, bytes_received, last_reported, total_bytes):
+    """Publish a download_progress event every PROGRESS_EVENT_BYTES, returns the new mark"""
+    if bytes_received - last_reported < PROGRESS_EVENT_BYTES:
+        return last_reported
+    event_bus.publish(
+        "download_progress", date=date_str, job_type=job_type,
+        bytes=bytes_received, total=total_bytes
+    )
+    return bytes_received
+
+
+def download_paths(url):
+    filename = url.split('/')[-1]
+    # Hidden partial file: never listed, only renamed into place once validated
+    return filename, os.path.join(downloads_dir, filename), os.path.join(downloads_dir, f".{filename}.part")
+
+
+def discard_partial(temp_path):
+    """Remove a half-written .part file left by a failed download"""
+    if temp_path:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+
+def finalize_download(temp_path, file_path, date_str, job_type, content_type, bytes_received):
+    """Validate a fully received payload, then move it into place or quarantine it"""
+    filename = os.path.basename(file_path)
+    valid, reason = validate_download(temp_path, job_type, content_type, display_name=filename)
+    if not valid:
+        entry = quarantine_download(temp_path, date_str, job_type, filename, reason)
+        error_msg = f"Invalid data for {date_str}: {reason} (quarantined, attempt {entry['attempts']})"
+        if entry['next_refetch']:
+            error_msg += f", re-fetch scheduled at {entry['next_refetch']}"
+        logging.error(error_msg)
+        event_bus.publish(
+            "download_failed", date=date_str, job_type=job_type, error=error_msg,
+            quarantined=True, next_refetch=entry['next_refetch']
+        )
+        return False, error_msg
+    
+    os.replace(temp_path, file_path)
+    clear_quarantine(date_str, job_type)
+    
+    # Extract if ZIP (integrity already verified)
+    if filename.endswith('.zip') or filename.endswith('.ZIP'):
+        with zipfile.ZipFile(file_path, 'r') as zip_ref:
+            zip_ref.extractall(downloads_dir)
+        logging.info(f"Extracted: {filename}")
+    
+    logging.info(f"Successfully downloaded: {filename}")
+    event_bus.publish(
+        "download_completed", date=date_str, job_type=job_type,
+        filename=filename, bytes=bytes_received
+    )
+    event_bus.publish("files_changed", file_type="downloaded")
+    return True, f"Downloaded: {filename}"
+
+
+def http_error_message(status_code, date_str, error):
+    if status_code == 404:
+        error_msg = f"File not found for {date_str} (likely holiday/weekend or data not available yet)"
+        logging.warning(error_msg)
+    else:
+        error_msg = f"HTTP Error {status_code} for {date_str}: {str(error)}"
+        logging.error(error_msg)
+    return error_msg
+
+
 def download_file(date_str, job_type):
     """Download file for a specific date and job type"""
+    temp_path = None
     try:
         date_obj = datetime.strptime(date_str, '%Y-%m-%d')
         url = get_download_url(date_obj, job_type)
         
         logging.info(f"Downloading from: {url}")
+        event_bus.publish("download_started", date=date_str, job_type=job_type, url=url)
         
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-        }
-        
-        response = requests.get(url, headers=headers, timeout=30)
+        response = requests.get(
+            url, headers={**DOWNLOAD_HEADERS, 'Connection': 'keep-alive'},
+            timeout=DOWNLOAD_TIMEOUT, stream=True
+        )
         response.raise_for_status()
         
-        filename = url.split('/')[-1]
-        file_path = os.path.join(downloads_dir, filename)
+        filename, file_path, temp_path = download_paths(url)
+        total_bytes = int(response.headers.get('Content-Length') or 0) or None
+        bytes_received = 0
+        last_reported = 0
         
-        with open(file_path, 'wb') as f:
-            f.write(response.content)
+        with open(temp_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+                bytes_received += len(chunk)
+                last_reported = report_progress(date_str, job_type, bytes_received, last_reported, total_bytes)
         
-        # Extract if ZIP
-        if filename.endswith('.zip') or filename.endswith('.ZIP'):
-            try:
-                with zipfile.ZipFile(file_path, 'r') as zip_ref:
-                    zip_ref.extractall(downloads_dir)
-                logging.info(f"Extracted: {filename}")
-            except zipfile.BadZipFile:
-                logging.warning(f"Could not extract {filename}, keeping as is")
-        
-        logging.info(f"Successfully downloaded: {filename}")
-        return True, f"Downloaded: {filename}"
+        return finalize_download(
+            temp_path, file_path, date_str, job_type,
+            response.headers.get('Content-Type'), bytes_received
+        )
         
     except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 404:
-            error_msg = f"File not found for {date_str} (likely holiday/weekend or data not available yet)"
-            logging.warning(error_msg)
-        else:
-            error_msg = f"HTTP Error {e.response.status_code} for {date_str}: {str(e)}"
-            logging.error(error_msg)
+        discard_partial(temp_path)
+        error_msg = http_error_message(e.response.status_code, date_str, e)
+        event_bus.publish("download_failed", date=date_str, job_type=job_type, error=error_msg)
         return False, error_msg
     except Exception as e:
+        discard_partial(temp_path)
         error_msg = f"Error downloading {date_str}: {str(e)}"
         logging.error(error_msg)
+        event_bus.publish("download_failed", date=date_str, job_type=job_type, error=error_msg)
         return False, error_msg
 
 
+# ===== ASYNC DOWNLOAD CLIENT (HTTPX, HTTP/2) =====
+# One pooled client for the app lifetime: requests to the NSE/BSE hosts share
+# a few (multiplexed) connections instead of one blocking thread per date.
+http_client = None
+
+
+async def open_http_client():
+    global http_client
+    if httpx is None:
+        logging.warning("httpx not installed - async downloads unavailable, using requests")
+        return
+    
+    limits = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+    try:
+        http_client = httpx.AsyncClient(
+            http2=True, headers=DOWNLOAD_HEADERS, timeout=DOWNLOAD_TIMEOUT,
+            limits=limits, follow_redirects=True
+        )
+    except ImportError:
+        # http2=True needs the optional h2 package
+        logging.warning("h2 not installed - async downloads will use HTTP/1.1")
+        http_client = httpx.AsyncClient(
+            headers=DOWNLOAD_HEADERS, timeout=DOWNLOAD_TIMEOUT,
+            limits=limits, follow_redirects=True
+        )
+
+
+async def close_http_client():
+    global http_client
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
+
+
+def use_async_downloads(settings):
+    return http_client is not None and settings.get('download_client') == 'httpx'
+
+
+async def download_file_async(date_str, job_type):
+    """Asyncio-native counterpart of download_file using the shared httpx client"""
+    temp_path = None
+    try:
+        date_obj = datetime.strptime(date_str, '%Y-%m-%d')
+        url = get_download_url(date_obj, job_type)
+        
+        logging.info(f"Downloading from: {url}")
+        event_bus.publish("download_started", date=date_str, job_type=job_type, url=url)
+        
+        filename, file_path, temp_path = download_paths(url)
+        async with http_client.stream('GET', url) as response:
+            response.raise_for_status()
+            content_type = response.headers.get('Content-Type')
+            total_bytes = int(response.headers.get('Content-Length') or 0) or None
+            bytes_received = 0
+            last_reported = 0
+            
+            # anyio runs the file I/O in worker threads so disk writes never block the loop
+            async with await anyio.open_file(temp_path, 'wb') as f:
+                async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    await f.write(chunk)
+                    bytes_received += len(chunk)
+                    last_reported = report_progress(date_str, job_type, bytes_received, last_reported, total_bytes)
+        
+        # Validation and extraction are CPU/disk bound - keep them off the loop
+        return await run_in_threadpool(
+            finalize_download, temp_path, file_path, date_str, job_type, content_type, bytes_received
+        )
+        
+    except httpx.HTTPStatusError as e:
+        discard_partial(temp_path)
+        error_msg = http_error_message(e.response.status_code, date_str, e)
+        event_bus.publish("download_failed", date=date_str, job_type=job_type, error=error_msg)
+        return False, error_msg
+    except Exception as e:
+        discard_partial(temp_path)
+        error_msg = f"Error downloading {date_str}: {str(e)}"
+        logging.error(error_msg)
+        event_bus.publish("download_failed", date=date_str, job_type=job_type, error=error_msg)
+        return False, error_msg
+
+
+# ===== DOWNLOAD STORAGE MANAGER (COMPACTION + RETENTION) =====
+# Canonical copy per trading day: the original archive for zipped downloads,
+# a gzip-compressed CSV for plain CSV downloads. Extracted CSVs are kept only
+# while they are recent and are re-created on demand for processing.
+def is_zip_name(filename):
+    return filename.lower().endswith('.zip')
+
+
+def list_download_entries():
+    """Return os.DirEntry objects for regular, non-hidden files in downloads_dir"""
+    if not os.path.exists(downloads_dir):
+        return []
+    with os.scandir(downloads_dir) as it:
+        return [entry for entry in it if entry.is_file() and not entry.name.startswith('.')]
+
+
+# zip path -> (mtime_ns, size, member basenames); a zip is only reopened when it changes
+zip_member_cache = {}
+zip_member_cache_lock = threading.Lock()
+
+
+def build_zip_member_index(entries=None):
+    """Map extracted member name -> path of the zip that contains it"""
+    member_index = {}
+    seen = set()
+    with zip_member_cache_lock:
+        for entry in entries if entries is not None else list_download_entries():
+            if not is_zip_name(entry.name):
+                continue
+            seen.add(entry.path)
+            stat = entry.stat()
+            cached = zip_member_cache.get(entry.path)
+            if cached is None or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+                try:
+                    with zipfile.ZipFile(entry.path, 'r') as zip_ref:
+                        members = [os.path.basename(member) for member in zip_ref.namelist()]
+                except zipfile.BadZipFile:
+                    members = []
+                cached = (stat.st_mtime_ns, stat.st_size, members)
+                zip_member_cache[entry.path] = cached
+            for member in cached[2]:
+                member_index[member] = entry.path
+        
+        # Forget zips that were deleted or evicted
+        for zip_path in list(zip_member_cache):
+            if zip_path not in seen:
+                del zip_member_cache[zip_path]
+    return member_index
+
+
+def gzip_file(file_path):
+    """Compress file_path to file_path.gz, keeping its mtime, and remove the original"""
+    gz_path = f"{file_path}.gz"
+    stat = os.stat(file_path)
+    with open(file_path, 'rb') as src, open(gz_path, 'wb') as raw:
+        with gzip.GzipFile(filename=os.path.basename(file_path), mode='wb', fileobj=raw, mtime=0) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+    os.utime(gz_path, (stat.st_atime, stat.st_mtime))
+    os.remove(file_path)
+    return gz_path
+
+
+def resolve_download_path(file_path):
+    """Map a requested download path onto whatever copy is stored on disk.
+
+    Returns the path itself if present, its .gz canonical copy, or the member
+    re-extracted from the zip it came from. Falls back to the original path.
+    """
+    if os.path.exists(file_path):
+        return file_path
+    
+    if os.path.exists(f"{file_path}.gz"):
+        return f"{file_path}.gz"
+    
+    filename = os.path.basename(file_path)
+    zip_path = build_zip_member_index().get(filename)
+    if zip_path:
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            member = next(m for m in zip_ref.namelist() if os.path.basename(m) == filename)
+            with zip_ref.open(member) as src, open(os.path.join(downloads_dir, filename), 'wb') as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+        logging.info(f"Restored {filename} from {os.path.basename(zip_path)}")
+        return os.path.join(downloads_dir, filename)
+    
+    return file_path
+
+
+def compact_downloads():
+    """Drop redundant extracted copies, compress CSVs and apply retention quotas"""
+    settings = load_settings()
+    now = datetime.now().timestamp()
+    compact_before = now - int(settings.get('storage_compact_after_days', 7)) * 86400
+    retention_days = int(settings.get('storage_retention_days', 0))
+    max_bytes = int(settings.get('storage_max_mb', 0)) * 1024 * 1024
+    
+    stats = {"removed_extracted": 0, "compressed": 0, "expired": 0, "evicted": 0, "bytes_freed": 0}
+    
+    # Payloads that ran out of re-fetch attempts are kept a while for inspection only
+    stats['quarantine_purged'] = purge_quarantine(int(settings.get('quarantine_retention_days', 7)))
+    
+    entries = list_download_entries()
+    member_index = build_zip_member_index(entries)
+    
+    for entry in entries:
+        stat = entry.stat()
+        if is_zip_name(entry.name) or entry.name.endswith('.gz') or stat.st_mtime > compact_before:
+            continue
+        
+        try:
+            if entry.name in member_index:
+                os.remove(entry.path)
+                stats['removed_extracted'] += 1
+                stats['bytes_freed'] += stat.st_size
+            elif entry.name.lower().endswith('.csv'):
+                gz_path = gzip_file(entry.path)
+                stats['compressed'] += 1
+                stats['bytes_freed'] += stat.st_size - os.path.getsize(gz_path)
+        except OSError as e:
+            logging.warning(f"Could not compact {entry.name}: {str(e)}")
+    
+    # Retention and size quota apply to whatever is left, oldest first
+    remaining = sorted(
+        ((entry, entry.stat()) for entry in list_download_entries()),
+        key=lambda item: item[1].st_mtime
+    )
+    total_size = sum(stat.st_size for _, stat in remaining)
+    
+    for entry, stat in remaining:
+        expired = retention_days > 0 and stat.st_mtime < now - retention_days * 86400
+        over_quota = max_bytes > 0 and total_size > max_bytes
+        if not expired and not over_quota:
+            continue
+        try:
+            os.remove(entry.path)
+        except OSError as e:
+            logging.warning(f"Could not remove {entry.name}: {str(e)}")
+            continue
+        total_size -= stat.st_size
+        stats['bytes_freed'] += stat.st_size
+        stats['expired' if expired else 'evicted'] += 1
+    
+    logging.info(
+        f"Storage compaction: {stats['removed_extracted']} extracted copies removed, "
+        f"{stats['compressed']} compressed, {stats['expired']} expired, "
+        f"{stats['evicted']} evicted, {stats['bytes_freed']} bytes freed"
+    )
+    event_bus.publish("files_changed", file_type="downloaded")
+    return stats
+
+
+def scheduled_compaction_task():
+    try:
+        compact_downloads()
+    except Exception as e:
+        logging.error(f"Storage compaction error: {str(e)}")
+
+
 # ===== SCHEDULED TASK FUNCTIONS =====
 def scheduled_download_task():
     """Task that runs on schedule - downloads NSE Bhavcopy for configured date"""
@@ -221,8 +1430,12 @@ def scheduled_download_task():
 
 
 def reload_scheduler_from_settings():
-    """Load scheduler config from settings and start if enabled"""
+    """Load scheduler config from settings and start if enabled (leader only)"""
     try:
+        if not coordinator.is_leader:
+            logging.info("Scheduler jobs are managed by the leader process")
+            return
+        
         settings = load_settings()
         if settings.get('scheduler_enabled', False):
             scheduler_time = settings.get('scheduler_time', '18:45')
@@ -244,72 +1457,314 @@ def reload_scheduler_from_settings():
             )
             logging.info(f" Scheduler loaded: Daily job at {scheduler_time}")
         else:
+            if scheduler.get_job('daily_download'):
+                scheduler.remove_job('daily_download')
             logging.info("Scheduler disabled in settings")
     except Exception as e:
         logging.error(f"Failed to reload scheduler: {str(e)}")
 
 
-reload_scheduler_from_settings()
+def reload_storage_job_from_settings():
+    """Register the background storage compaction job if enabled (leader only)"""
+    try:
+        if not coordinator.is_leader:
+            return
+        
+        settings = load_settings()
+        try:
+            scheduler.remove_job('storage_compaction')
+        except:
+            pass
+        
+        if settings.get('storage_compaction_enabled', True):
+            interval_hours = max(1, int(settings.get('storage_compact_interval_hours', 6)))
+            scheduler.add_job(
+                scheduled_compaction_task,
+                trigger='interval',
+                hours=interval_hours,
+                id='storage_compaction',
+                replace_existing=True
+            )
+            logging.info(f" Storage compaction scheduled every {interval_hours}h")
+        else:
+            logging.info("Storage compaction disabled in settings")
+    except Exception as e:
+        logging.error(f"Failed to reload storage job: {str(e)}")
+
+
+# ===== SCHEDULER LEADERSHIP =====
+class SchedulerCoordinator:
+    """Elects exactly one process to own recurring jobs via a lock file.
+
+    The leader reloads jobs whenever settings.json changes (other workers only
+    write settings) and publishes next run times to scheduler_state.json.
+    Followers keep retrying so leadership moves if the leader exits.
+    """
+    poll_seconds = 5
+
+    def __init__(self):
+        self.lock = FileLock(os.path.join(state_dir, 'scheduler.lock'))
+        self.is_leader = False
+        self.settings_mtime = None
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.stop_event.clear()
+        self.tick()
+        self.thread = threading.Thread(target=self.run, name='scheduler-coordinator', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=self.poll_seconds + 1)
+        if self.is_leader:
+            self.is_leader = False
+            self.lock.release()
+
+    def run(self):
+        while not self.stop_event.wait(self.poll_seconds):
+            try:
+                self.tick()
+            except Exception as e:
+                logging.error(f"Scheduler coordinator error: {str(e)}")
+
+    def tick(self):
+        if not self.is_leader:
+            if not self.lock.acquire(blocking=False):
+                return
+            self.is_leader = True
+            logging.info(f" Scheduler leadership acquired by process {os.getpid()}")
+        
+        mtime = os.path.getmtime(settings_file) if os.path.exists(settings_file) else None
+        if mtime != self.settings_mtime:
+            first_load = self.settings_mtime is None
+            self.settings_mtime = mtime
+            reload_scheduler_from_settings()
+            reload_storage_job_from_settings()
+            if not first_load:
+                event_bus.publish(
+                    "scheduler_job", job_id='daily_download', state="reloaded",
+                    next_run=self.next_run('daily_download')
+                )
+        
+        write_json_atomic(scheduler_state_file, {
+            "leader_pid": os.getpid(),
+            "updated": datetime.now().isoformat(),
+            "jobs": {job.id: str(job.next_run_time) for job in scheduler.get_jobs()}
+        })
+        run_due_refetches()
+        if multi_worker:
+            shared_event_log.truncate_if_large()
+
+    def next_run(self, job_id):
+        """Next run time of a recurring job, as seen by the leader"""
+        if self.is_leader:
+            job = scheduler.get_job(job_id)
+            return str(job.next_run_time) if job else None
+        
+        try:
+            with open(scheduler_state_file, 'r') as f:
+                return json.load(f).get('jobs', {}).get(job_id)
+        except (OSError, ValueError):
+            return None
+
+
+coordinator = SchedulerCoordinator()
+
+
+# ===== PROCESSED OUTPUT CACHE (CONTENT-ADDRESSED) =====
+# Bump when the processing logic changes so stale outputs are not reused
+PROCESSOR_VERSION = "1"
+PROCESS_OPTIONS = {"sheet_name": "Data", "index": False}
+
+cache_index_file = os.path.join(processed_dir, '.process_cache.json')
+cache_lock = FileLock(os.path.join(state_dir, 'process_cache.lock'))
+
+
+def compute_process_key(file_path, options=None):
+    """Hash input bytes plus processing options into a cache key.
+
+    Compacted .gz copies are hashed decompressed so they keep the key of the
+    original CSV.
+    """
+    hasher = hashlib.sha256()
+    hasher.update(PROCESSOR_VERSION.encode('utf-8'))
+    hasher.update(json.dumps(options or PROCESS_OPTIONS, sort_keys=True).encode('utf-8'))
+    opener = gzip.open if file_path.endswith('.gz') else open
+    with opener(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def load_cache_index():
+    if os.path.exists(cache_index_file):
+        try:
+            with open(cache_index_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            logging.warning("Process cache index unreadable, starting fresh")
+    return {}
+
+
+def save_cache_index(index):
+    write_json_atomic(cache_index_file, index)
+
+
+def get_cached_output(key):
+    """Return the cache entry for key if its output still exists, else None"""
+    with cache_lock:
+        index = load_cache_index()
+        entry = index.get(key)
+        if not entry:
+            return None
+        
+        if not os.path.isfile(os.path.join(processed_dir, entry['output_file'])):
+            # Output was deleted behind our back - drop the stale entry
+            del index[key]
+            save_cache_index(index)
+            return None
+        
+        entry['last_used'] = datetime.now().timestamp()
+        save_cache_index(index)
+        return entry
+
+
+def store_cached_output(key, entry):
+    """Record a processed output and evict least recently used ones over quota"""
+    max_bytes = int(load_settings().get('processed_cache_max_mb', 500)) * 1024 * 1024
+    
+    with cache_lock:
+        index = load_cache_index()
+        entry['last_used'] = datetime.now().timestamp()
+        index[key] = entry
+        
+        # Refresh sizes and forget outputs that no longer exist
+        for cache_key in list(index.keys()):
+            output_path = os.path.join(processed_dir, index[cache_key]['output_file'])
+            if os.path.isfile(output_path):
+                index[cache_key]['size'] = os.path.getsize(output_path)
+            else:
+                del index[cache_key]
+        
+        total_size = sum(item['size'] for item in index.values())
+        if max_bytes > 0:
+            for cache_key in sorted(index, key=lambda k: index[k]['last_used']):
+                if total_size <= max_bytes:
+                    break
+                if cache_key == key:
+                    continue
+                evicted = index.pop(cache_key)
+                try:
+                    os.remove(os.path.join(processed_dir, evicted['output_file']))
+                except OSError:
+                    pass
+                total_size -= evicted['size']
+                logging.info(f"Evicted cached output: {evicted['output_file']}")
+        
+        save_cache_index(index)
 
 
 # ===== EXCEL PROCESSING FUNCTIONS =====
 @app.post("/api/process_excel")
 async def process_excel(request: ProcessRequest):
+    # Run off the event loop so stage events reach /api/events while processing
+    return await run_in_threadpool(process_file, request.file_path)
+
+
+def process_file(file_path):
     """UNIVERSAL PROCESSOR - Handles ALL file types"""
     try:
-        file_path = request.file_path
-        
         if not os.path.isabs(file_path):
             file_path = os.path.join(downloads_dir, file_path)
         
+        if server_mode:
+            real_downloads_dir = os.path.realpath(downloads_dir)
+            if os.path.commonpath([os.path.realpath(file_path), real_downloads_dir]) != real_downloads_dir:
+                raise HTTPException(status_code=400, detail="Only files in the downloads folder can be processed")
+        
+        file_path = resolve_download_path(file_path)
         logging.info(f" Processing file: {file_path}")
         
         if not os.path.exists(file_path):
             raise HTTPException(status_code=404, detail=f"File not found: {file_path}")
         
         filename = os.path.basename(file_path)
+        event_bus.publish("processing_stage", file=filename, stage="started")
+        cache_key = compute_process_key(file_path)
+        
+        cached = get_cached_output(cache_key)
+        if cached:
+            logging.info(f" Reusing processed output: {cached['output_file']}")
+            event_bus.publish("processing_stage", file=filename, stage="cached", output_file=cached['output_file'])
+            return {
+                "status": "success",
+                "output_file": cached['output_file'],
+                "rows_processed": cached['rows_processed'],
+                "columns": cached['columns'],
+                "cached": True,
+                "message": f"Already processed: {cached['rows_processed']} rows with {cached['columns']} columns"
+            }
         
         try:
-            if file_path.endswith('.csv') or not '.' in filename or filename.endswith(tuple('0123456789')):
+            event_bus.publish("processing_stage", file=filename, stage="reading")
+            if file_path.endswith(('.csv', '.csv.gz', '.CSV.gz')) or not '.' in filename or filename.endswith(tuple('0123456789')):
                 df = pd.read_csv(file_path)
                 
             elif file_path.endswith(('.xlsx', '.xls')):
                 df = pd.read_excel(file_path)
                 
             elif file_path.endswith(('.zip', '.ZIP')):
-                extract_dir = os.path.dirname(file_path)
+                # Read the zip's own member so the output depends only on the hashed input
                 with zipfile.ZipFile(file_path, 'r') as zip_ref:
-                    zip_ref.extractall(extract_dir)
-                
-                csv_files = [f for f in os.listdir(extract_dir) 
-                           if f.endswith('.csv') or f.startswith('pd') or f.startswith('pr')]
-                
-                if csv_files:
-                    csv_path = os.path.join(extract_dir, csv_files[0])
-                    df = pd.read_csv(csv_path)
-                    logging.info(f"Extracted and processing: {csv_files[0]}")
-                else:
-                    raise ValueError("No CSV files found in ZIP")
+                    csv_members = [
+                        name for name in zip_ref.namelist()
+                        if not name.endswith('/') and (
+                            name.lower().endswith('.csv')
+                            or os.path.basename(name).startswith(('pd', 'pr'))
+                        )
+                    ]
+                    
+                    if not csv_members:
+                        raise ValueError("No CSV files found in ZIP")
+                    
+                    with zip_ref.open(csv_members[0]) as member:
+                        df = pd.read_csv(member)
+                    logging.info(f"Processing zip member: {csv_members[0]}")
             else:
                 raise ValueError(f"Unsupported file format: {filename}")
             
             logging.info(f"Successfully read {len(df)} rows, {len(df.columns)} columns")
             logging.info(f" Columns: {df.columns.tolist()[:10]}...")
             
-            base_name = filename.replace('.zip', '').replace('.csv', '').replace('.xlsx', '').replace('.CSV', '')
+            base_name = filename.replace('.gz', '').replace('.zip', '').replace('.csv', '').replace('.xlsx', '').replace('.CSV', '')
             output_filename = f"Processed_{base_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
             output_path = os.path.join(processed_dir, output_filename)
             
+            event_bus.publish("processing_stage", file=filename, stage="writing", rows=len(df))
             with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Data', index=False)
+                df.to_excel(writer, **PROCESS_OPTIONS)
             
             logging.info(f" Saved processed file: {output_path}")
             
+            store_cached_output(cache_key, {
+                "output_file": output_filename,
+                "source_file": filename,
+                "rows_processed": len(df),
+                "columns": len(df.columns),
+                "size": os.path.getsize(output_path)
+            })
+            event_bus.publish("processing_stage", file=filename, stage="completed", output_file=output_filename)
+            event_bus.publish("files_changed", file_type="processed")
+            
             return {
                 "status": "success",
                 "output_file": output_filename,
                 "rows_processed": len(df),
                 "columns": len(df.columns),
+                "cached": False,
                 "message": f"Successfully processed {len(df)} rows with {len(df.columns)} columns"
             }
             
@@ -320,10 +1775,12 @@ async def process_excel(request: ProcessRequest):
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
         
-    except HTTPException:
+    except HTTPException as e:
+        event_bus.publish("processing_stage", file=os.path.basename(file_path), stage="failed", error=e.detail)
         raise
     except Exception as e:
         logging.error(f"Processing error: {str(e)}")
+        event_bus.publish("processing_stage", file=os.path.basename(file_path), stage="failed", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -344,25 +1801,58 @@ async def start_download(request: DownloadRequest):
         
         start_date = datetime.strptime(request.date_from, '%Y-%m-%d')
         end_date = datetime.strptime(request.date_to, '%Y-%m-%d')
+        event_bus.publish(
+            "download_batch_started", job_type=request.job_type,
+            date_from=request.date_from, date_to=request.date_to
+        )
         
         success_count = 0
         failed_count = 0
         results = []
         
+        trading_dates = []
         current_date = start_date
         while current_date <= end_date:
             if current_date.weekday() < 5:
-                success, message = download_file(current_date.strftime('%Y-%m-%d'), request.job_type)
+                trading_dates.append(current_date.strftime('%Y-%m-%d'))
+            current_date += timedelta(days=1)
+        
+        # One settings read per request, off the event loop
+        settings = await run_in_threadpool(load_settings)
+        if use_async_downloads(settings):
+            # All dates in flight at once, bounded by download_concurrency
+            semaphore = asyncio.Semaphore(max(1, int(settings.get('download_concurrency', 8))))
+            
+            async def fetch(date_str):
+                async with semaphore:
+                    return await download_file_async(date_str, request.job_type)
+            
+            outcomes = await asyncio.gather(*(fetch(date_str) for date_str in trading_dates))
+        else:
+            outcomes = []
+            for date_str in trading_dates:
+                outcomes.append(await run_in_threadpool(download_file, date_str, request.job_type))
+        outcomes = dict(zip(trading_dates, outcomes))
+        
+        current_date = start_date
+        while current_date <= end_date:
+            date_str = current_date.strftime('%Y-%m-%d')
+            if date_str in outcomes:
+                success, message = outcomes[date_str]
                 if success:
                     success_count += 1
                 else:
                     failed_count += 1
                 results.append(message)
             else:
-                results.append(f"Skipped {current_date.strftime('%Y-%m-%d')} (weekend)")
+                results.append(f"Skipped {date_str} (weekend)")
             
             current_date += timedelta(days=1)
         
+        event_bus.publish(
+            "download_batch_completed", job_type=request.job_type,
+            successful=success_count, failed=failed_count
+        )
         return {
             "status": "success",
             "message": f"Download completed: {success_count} successful, {failed_count} failed",
@@ -374,18 +1864,71 @@ async def start_download(request: DownloadRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/events/ticket")
+async def event_ticket():
+    """Short-lived ticket for opening /api/events without putting the token in the URL"""
+    if not server_mode:
+        return {"ticket": None, "expires_in": None}
+    return {"ticket": issue_event_ticket(), "expires_in": EVENT_TICKET_TTL_SECONDS}
+
+
+@app.get("/api/events")
+async def event_stream(request: Request):
+    """Server-sent event stream of download, processing, scheduler and log events"""
+    queue = event_bus.subscribe()
+    
+    async def generate():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"data: {json.dumps(event)}\n\n"
+        finally:
+            event_bus.unsubscribe(queue)
+    
+    return StreamingResponse(
+        generate(),
+        media_type='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def tail_lines(path, count, block_size=64 * 1024):
+    """Return the last count lines of a text file, reading backwards from the end"""
+    if not os.path.exists(path):
+        return []
+    
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b''
+        # count + 1 newlines guarantees the first kept line is complete
+        while position > 0 and data.count(b'\n') <= count:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            data = f.read(read_size) + data
+    
+    lines = data.decode('utf-8', errors='replace').splitlines(keepends=True)
+    return lines[-count:]
+
+
 @app.get("/api/logs")
-async def get_logs():
+def get_logs():
+    # Sync endpoint: runs in the threadpool since it may wait on log_file_lock
     try:
         # Force flush all pending logs
         for log_handler in logging.getLogger().handlers:
             log_handler.flush()
         
-        if os.path.exists(log_file):
-            with open(log_file, 'r') as f:
-                logs = f.readlines()
-                return {"logs": logs[-100:]}
-        return {"logs": []}
+        if multi_worker:
+            with log_file_lock:
+                return {"logs": tail_lines(log_file, 100)}
+        return {"logs": tail_lines(log_file, 100)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -421,7 +1964,15 @@ async def save_settings(settings: SettingsModel):
         if scheduler_changed:
             reload_scheduler_from_settings()
         
+        storage_changed = any(
+            old_settings.get(key) != settings_dict[key]
+            for key in ('storage_compaction_enabled', 'storage_compact_interval_hours')
+        )
+        if storage_changed:
+            reload_storage_job_from_settings()
+        
         logging.info("Settings saved successfully")
+        event_bus.publish("settings_changed", scheduler_restarted=scheduler_changed)
         
         response_data = {
             "status": "success",
@@ -442,7 +1993,13 @@ async def save_settings(settings: SettingsModel):
 @app.post("/api/scheduler/start")
 async def start_scheduler():
     try:
+        # Persisted so the leader process (possibly another worker) picks it up
+        update_settings(scheduler_enabled=True)
         reload_scheduler_from_settings()
+        event_bus.publish(
+            "scheduler_job", job_id='daily_download', state="started",
+            next_run=coordinator.next_run('daily_download')
+        )
         return {"status": "success", "message": "Scheduler started"}
     except Exception as e:
         logging.error(f"Scheduler start error: {str(e)}")
@@ -452,8 +2009,12 @@ async def start_scheduler():
 @app.post("/api/scheduler/stop")
 async def stop_scheduler():
     try:
-        scheduler.remove_job('daily_download')
+        if not coordinator.next_run('daily_download'):
+            raise LookupError("No active scheduler")
+        update_settings(scheduler_enabled=False)
+        reload_scheduler_from_settings()
         logging.info("Scheduler stopped")
+        event_bus.publish("scheduler_job", job_id='daily_download', state="stopped", next_run=None)
         return {"status": "success", "message": "Scheduler stopped"}
     except:
         return {"status": "error", "message": "No active scheduler"}
@@ -463,19 +2024,13 @@ async def stop_scheduler():
 async def scheduler_status():
     """Get current scheduler status and next run time"""
     try:
-        jobs = scheduler.get_jobs()
-        daily_job = None
+        next_run = coordinator.next_run('daily_download')
         
-        for job in jobs:
-            if job.id == 'daily_download':
-                daily_job = job
-                break
-        
-        if daily_job:
+        if next_run:
             return {
                 "status": "running",
-                "next_run": str(daily_job.next_run_time),
-                "job_id": daily_job.id
+                "next_run": next_run,
+                "job_id": 'daily_download'
             }
         else:
             return {
@@ -488,24 +2043,132 @@ async def scheduler_status():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ===== PROFILING ENDPOINTS =====
+def require_profiling():
+    if not profiling_enabled:
+        raise HTTPException(status_code=404, detail="Profiling is disabled. Start the backend with --profile")
+
+
+@app.get("/api/profiling/startup")
+async def get_startup_profile():
+    """Import-time and startup breakdown of this process"""
+    require_profiling()
+    return {"pid": os.getpid(), **startup_timings}
+
+
+@app.get("/api/profiling/latency")
+async def get_latency_profile(reset: bool = False):
+    """Per-route latency percentiles since startup (or the last reset)"""
+    require_profiling()
+    summary = latency_recorder.summary()
+    if reset:
+        latency_recorder.reset()
+    return {"pid": os.getpid(), "routes": summary}
+
+
+@app.get("/api/profiling/capture")
+async def capture_profile(seconds: float = 5, interval_ms: float = 5, format: str = "speedscope"):
+    """Sample all threads for N seconds and return a speedscope or collapsed-stack profile"""
+    require_profiling()
+    if format not in ("speedscope", "collapsed"):
+        raise HTTPException(status_code=400, detail="Invalid format. Use 'speedscope' or 'collapsed'")
+    if not 0 < seconds <= 60 or not 1 <= interval_ms <= 1000:
+        raise HTTPException(status_code=400, detail="seconds must be in (0, 60] and interval_ms in [1, 1000]")
+    if not profiler_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="A profile capture is already running")
+    
+    try:
+        logging.info(f"Capturing {seconds}s sampling profile")
+        profiler = await run_in_threadpool(SamplingProfiler(seconds, interval_ms).run)
+    finally:
+        profiler_lock.release()
+    
+    filename = f"homestock_profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    if format == "collapsed":
+        return Response(
+            profiler.to_collapsed(),
+            media_type='text/plain',
+            headers={"Content-Disposition": f'attachment; filename="{filename}.txt"'}
+        )
+    return Response(
+        json.dumps(profiler.to_speedscope()),
+        media_type='application/json',
+        headers={"Content-Disposition": f'attachment; filename="{filename}.speedscope.json"'}
+    )
+
+
+# ===== QUARANTINE ENDPOINTS =====
+@app.get("/api/quarantine")
+async def get_quarantine():
+    """List downloads rejected by validation and their re-fetch status"""
+    try:
+        entries = sorted(load_quarantine_index().values(), key=lambda e: e['quarantined_at'], reverse=True)
+        return {"entries": entries}
+    except Exception as e:
+        logging.error(f"Error getting quarantine: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.delete("/api/quarantine")
+async def clear_exhausted_quarantine():
+    """Remove every quarantined payload that has no re-fetch left"""
+    try:
+        removed = await run_in_threadpool(purge_quarantine)
+        return {"status": "success", "message": f"Removed {removed} quarantined files", "removed": removed}
+    except Exception as e:
+        logging.error(f"Error clearing quarantine: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ===== STORAGE ENDPOINTS =====
+@app.get("/api/storage/stats")
+async def get_storage_stats():
+    """Get canonical vs redundant storage usage of the downloads directory"""
+    try:
+        entries = list_download_entries()
+        member_index = build_zip_member_index(entries)
+        
+        canonical = {"count": 0, "total_size": 0}
+        extracted = {"count": 0, "total_size": 0}
+        for entry in entries:
+            bucket = extracted if entry.name in member_index else canonical
+            bucket['count'] += 1
+            bucket['total_size'] += entry.stat().st_size
+        
+        return {
+            "canonical": canonical,
+            "extracted": extracted,
+            "next_compaction": coordinator.next_run('storage_compaction')
+        }
+    except Exception as e:
+        logging.error(f"Error getting storage stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/storage/compact")
+async def compact_storage():
+    """Run storage compaction and retention immediately"""
+    try:
+        stats = await run_in_threadpool(compact_downloads)
+        return {"status": "success", "message": "Storage compaction completed", **stats}
+    except Exception as e:
+        logging.error(f"Storage compaction error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # ===== FILE MANAGEMENT ENDPOINTS =====
 @app.get("/api/files/downloaded")
 async def get_downloaded_files():
     """Get list of downloaded files with metadata"""
     try:
         files = []
-        if not os.path.exists(downloads_dir):
-            return {"files": []}
-            
-        for filename in os.listdir(downloads_dir):
-            file_path = os.path.join(downloads_dir, filename)
-            if os.path.isfile(file_path):
-                stat = os.stat(file_path)
-                files.append({
-                    "name": filename,
-                    "size": stat.st_size,
-                    "modified": datetime.fromtimestamp(stat.st_mtime).isoformat()
-                })
+        for entry in list_download_entries():
+            stat = entry.stat()
+            files.append({
+                "name": entry.name,
+                "size": stat.st_size,
+                "modified": datetime.fromtimestamp(stat.st_mtime).isoformat()
+            })
         
         files.sort(key=lambda x: x['modified'], reverse=True)
         logging.info(f"Retrieved {len(files)} downloaded files")
@@ -525,7 +2188,8 @@ async def get_processed_files():
             
         for filename in os.listdir(processed_dir):
             file_path = os.path.join(processed_dir, filename)
-            if os.path.isfile(file_path):
+            # Skip internal bookkeeping files such as the process cache index
+            if os.path.isfile(file_path) and not filename.startswith('.'):
                 stat = os.stat(file_path)
                 files.append({
                     "name": filename,
@@ -541,36 +2205,185 @@ async def get_processed_files():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ===== FILE SERVING HELPERS =====
+# Text formats worth gzipping on the fly; xlsx/zip/gz are already compressed
+COMPRESSIBLE_EXTENSIONS = ('.csv', '.txt', '.json', '.log')
+MIN_COMPRESS_SIZE = 1024
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def resolve_managed_file(file_type, filename):
+    """Validate file_type/filename and return (requested_path, stored_path).
+
+    stored_path differs from requested_path when a downloaded CSV only exists
+    as its compacted .gz canonical copy.
+    """
+    if file_type == "downloaded":
+        base_dir = downloads_dir
+    elif file_type == "processed":
+        base_dir = processed_dir
+    else:
+        raise HTTPException(status_code=400, detail="Invalid file type. Use 'downloaded' or 'processed'")
+    
+    base_dir = os.path.realpath(base_dir)
+    file_path = os.path.realpath(os.path.join(base_dir, filename))
+    if os.path.dirname(file_path) != base_dir or os.path.basename(file_path).startswith('.'):
+        raise HTTPException(status_code=400, detail="Invalid file path")
+    
+    stored_path = file_path
+    if file_type == "downloaded" and not os.path.exists(file_path) and os.path.isfile(f"{file_path}.gz"):
+        stored_path = f"{file_path}.gz"
+    
+    if not os.path.exists(stored_path):
+        raise HTTPException(status_code=404, detail=f"File not found: {filename}")
+    
+    if not os.path.isfile(stored_path):
+        raise HTTPException(status_code=400, detail="Not a valid file")
+    
+    return file_path, stored_path
+
+
+def make_etag(stat, encoding=None):
+    etag = f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+    if encoding:
+        etag = f"{etag}-{encoding}"
+    return f'"{etag}"'
+
+
+def etag_matches(if_none_match, etags):
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    return '*' in candidates or any(etag in candidates for etag in etags)
+
+
+def accepts_gzip(accept_encoding):
+    """True if Accept-Encoding allows gzip; an explicit gzip entry takes precedence over *"""
+    qualities = {}
+    for part in (accept_encoding or '').split(','):
+        coding, *params = [piece.strip() for piece in part.split(';')]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            qualities[coding.lower()] = quality
+    
+    return qualities.get('gzip', qualities.get('*', 0.0)) > 0
+
+
+def iter_file(file_path):
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(STREAM_CHUNK_SIZE), b''):
+            yield chunk
+
+
+def iter_gzip_compressed(file_path):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in iter_file(file_path):
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def iter_gzip_decompressed(file_path):
+    with gzip.open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(STREAM_CHUNK_SIZE), b''):
+            yield chunk
+
+
+class ZipStreamBuffer:
+    """Write-only sink for zipfile that hands out bytes as they are produced"""
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_zip_stream(files):
+    """Yield a zip archive of (arcname, path) pairs without touching disk"""
+    buffer = ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, 'w') as zip_out:
+        for arcname, file_path in files:
+            compress_type = zipfile.ZIP_DEFLATED if arcname.lower().endswith(COMPRESSIBLE_EXTENSIONS) else zipfile.ZIP_STORED
+            info = zipfile.ZipInfo.from_file(file_path, arcname)
+            info.compress_type = compress_type
+            with zip_out.open(info, 'w') as dst:
+                for chunk in iter_file(file_path):
+                    dst.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            yield buffer.drain()
+    yield buffer.drain()
+
+
 @app.get("/api/files/download/{file_type}/{filename}")
-async def download_file_endpoint(file_type: str, filename: str):
-    """Download a specific file from server"""
+async def download_file_endpoint(file_type: str, filename: str, request: Request):
+    """Download a specific file with ETag revalidation, Range and gzip support"""
     try:
-        if file_type == "downloaded":
-            base_dir = downloads_dir
-        elif file_type == "processed":
-            base_dir = processed_dir
-        else:
-            raise HTTPException(status_code=400, detail="Invalid file type. Use 'downloaded' or 'processed'")
+        file_path, stored_path = resolve_managed_file(file_type, filename)
+        stat = os.stat(stored_path)
+        precompressed = stored_path != file_path
         
-        file_path = os.path.join(base_dir, filename)
-        if not file_path.startswith(base_dir):
-            raise HTTPException(status_code=400, detail="Invalid file path")
+        use_gzip = accepts_gzip(request.headers.get('accept-encoding'))
+        range_requested = 'range' in request.headers
+        compress_on_the_fly = (
+            not precompressed and use_gzip and not range_requested
+            and filename.lower().endswith(COMPRESSIBLE_EXTENSIONS)
+            and stat.st_size >= MIN_COMPRESS_SIZE
+        )
         
-        if not os.path.exists(file_path):
-            raise HTTPException(status_code=404, detail=f"File not found: {filename}")
+        if precompressed:
+            etag = make_etag(stat, 'gzip' if use_gzip else 'identity')
+        else:
+            etag = make_etag(stat, 'gzip' if compress_on_the_fly else None)
         
-        if not os.path.isfile(file_path):
-            raise HTTPException(status_code=400, detail="Not a valid file")
+        headers = {
+            "ETag": etag,
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+            "Content-Disposition": f'attachment; filename="{filename}"'
+        }
+        
+        if etag_matches(request.headers.get('if-none-match'), [etag]):
+            return Response(status_code=304, headers={k: headers[k] for k in ("ETag", "Cache-Control", "Vary")})
         
         logging.info(f"Downloading file: {filename} from {file_type}")
         
+        if precompressed and use_gzip:
+            # Serve the canonical .gz copy as-is; ranges apply to the encoded bytes
+            headers["Content-Encoding"] = "gzip"
+            return FileResponse(path=stored_path, media_type='application/octet-stream', headers=headers)
+        
+        if precompressed:
+            headers["Accept-Ranges"] = "none"
+            return StreamingResponse(iter_gzip_decompressed(stored_path), media_type='application/octet-stream', headers=headers)
+        
+        if compress_on_the_fly:
+            headers["Content-Encoding"] = "gzip"
+            return StreamingResponse(iter_gzip_compressed(stored_path), media_type='application/octet-stream', headers=headers)
+        
+        # FileResponse handles Range / If-Range and sets Accept-Ranges itself
         return FileResponse(
-            path=file_path,
+            path=stored_path,
             media_type='application/octet-stream',
-            filename=filename,
-            headers={
-                "Content-Disposition": f'attachment; filename="{filename}"'
-            }
+            headers=headers
         )
     except HTTPException:
         raise
@@ -579,6 +2392,33 @@ async def download_file_endpoint(file_type: str, filename: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/files/bulk_download")
+async def bulk_download_endpoint(request: BulkDownloadRequest):
+    """Stream a zip of several files without writing it to disk"""
+    try:
+        if not request.filenames:
+            raise HTTPException(status_code=400, detail="No files selected")
+        
+        files = []
+        for filename in dict.fromkeys(request.filenames):
+            _, stored_path = resolve_managed_file(request.file_type, filename)
+            files.append((os.path.basename(stored_path), stored_path))
+        
+        archive_name = f"HomeStock_{request.file_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+        logging.info(f"Streaming {len(files)} {request.file_type} files as {archive_name}")
+        
+        return StreamingResponse(
+            iter_zip_stream(files),
+            media_type='application/zip',
+            headers={"Content-Disposition": f'attachment; filename="{archive_name}"'}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Bulk download error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.delete("/api/files/{file_type}/{filename}")
 async def delete_file_endpoint(file_type: str, filename: str):
     """Delete a specific file from server"""
@@ -602,6 +2442,7 @@ async def delete_file_endpoint(file_type: str, filename: str):
         
         os.remove(file_path)
         logging.info(f"Deleted file: {filename} from {file_type} directory")
+        event_bus.publish("files_changed", file_type=file_type)
         
         return {
             "status": "success",
@@ -623,17 +2464,14 @@ async def get_files_stats():
         processed_count = 0
         processed_size = 0
         
-        if os.path.exists(downloads_dir):
-            for filename in os.listdir(downloads_dir):
-                file_path = os.path.join(downloads_dir, filename)
-                if os.path.isfile(file_path):
-                    downloaded_count += 1
-                    downloaded_size += os.path.getsize(file_path)
+        for entry in list_download_entries():
+            downloaded_count += 1
+            downloaded_size += entry.stat().st_size
         
         if os.path.exists(processed_dir):
             for filename in os.listdir(processed_dir):
                 file_path = os.path.join(processed_dir, filename)
-                if os.path.isfile(file_path):
+                if os.path.isfile(file_path) and not filename.startswith('.'):
                     processed_count += 1
                     processed_size += os.path.getsize(file_path)
         
@@ -653,6 +2491,42 @@ async def get_files_stats():
 
 
 if __name__ == "__main__":
+    # Required for uvicorn worker processes in the PyInstaller build
+    multiprocessing.freeze_support()
+    
+    parser = argparse.ArgumentParser(description="HomeStock Python Backend")
+    parser.add_argument('--server', action='store_true',
+                        help="headless server mode: listen on all interfaces with one worker per CPU, "
+                             "token required on every request")
+    parser.add_argument('--token', default=None,
+                        help="shared API token for server mode (default: $HOMESTOCK_API_TOKEN, else generated)")
+    parser.add_argument('--cors-origins', default=None,
+                        help=f"comma-separated allowed origins in server mode (default: {DEFAULT_SERVER_CORS_ORIGINS})")
+    parser.add_argument('--host', default=None, help="bind address (default 127.0.0.1, or 0.0.0.0 with --server)")
+    parser.add_argument('--port', type=int, default=8000, help="bind port (default 8000)")
+    parser.add_argument('--workers', type=int, default=None, help="number of API worker processes")
+    parser.add_argument('--profile', action='store_true',
+                        help="enable request timing and /api/profiling endpoints")
+    args = parser.parse_args()
+    
+    if args.profile:
+        # Env var carries the flag into worker processes, which re-import this module
+        os.environ['HOMESTOCK_PROFILING'] = '1'
+        enable_profiling()
+    
+    host = args.host or ("0.0.0.0" if args.server else "127.0.0.1")
+    workers = max(1, args.workers or ((os.cpu_count() or 1) if args.server else 1))
+    # Binding anything but loopback exposes the API, so it always gets server-mode protection
+    use_server_mode = args.server or host not in ("127.0.0.1", "localhost", "::1")
+    token = None
+    
+    if use_server_mode:
+        token = args.token or os.environ.get('HOMESTOCK_API_TOKEN') or secrets.token_urlsafe(32)
+        os.environ['HOMESTOCK_SERVER_MODE'] = '1'
+        os.environ['HOMESTOCK_API_TOKEN'] = token
+        if args.cors_origins is not None:
+            os.environ['HOMESTOCK_CORS_ORIGINS'] = args.cors_origins
+    
     print("=" * 60)
     print("HomeStock Python Backend v2.0.1")
     print("=" * 60)
@@ -661,17 +2535,32 @@ if __name__ == "__main__":
     print(" Scheduler Ready")
     print(" Instant Log Flushing Enabled")
     print("=" * 60)
-    print("Server: http://127.0.0.1:8000")
-    print("Port: 8000")
+    print(f"Server: http://{host}:{args.port}")
+    print(f"Port: {args.port}")
+    print(f"Workers: {workers}")
+    if token:
+        print(f"API token: {token}")
     print("=" * 60)
     
     try:
-        uvicorn.run(
-            app,
-            host="127.0.0.1",
-            port=8000,
-            log_level="info"
-        )
+        if workers > 1 or use_server_mode:
+            # The app is re-imported by name so it picks up the mode flags from env
+            os.environ['HOMESTOCK_WORKERS'] = str(workers)
+            uvicorn.run(
+                "main:app",
+                host=host,
+                port=args.port,
+                workers=workers,
+                app_dir=os.path.dirname(os.path.abspath(__file__)),
+                log_level="info"
+            )
+        else:
+            uvicorn.run(
+                app,
+                host=host,
+                port=args.port,
+                log_level="info"
+            )
     except Exception as e:
         print(f"Error starting server: {e}")
     
@@ -3,7 +3,7 @@ from PyInstaller.utils.hooks import collect_all
 
 datas = []
 binaries = []
-hiddenimports = ['uvicorn', 'uvicorn.logging', 'uvicorn.loops', 'uvicorn.loops.auto', 'uvicorn.protocols', 'uvicorn.protocols.http', 'uvicorn.protocols.http.auto', 'uvicorn.protocols.websockets', 'uvicorn.protocols.websockets.auto', 'uvicorn.lifespan', 'uvicorn.lifespan.on', 'fastapi', 'pydantic', 'pydantic.dataclasses', 'pydantic_core', 'starlette', 'starlette.routing', 'openpyxl', 'openpyxl.styles', 'pandas', 'pandas._libs', 'apscheduler', 'apscheduler.schedulers.background', 'apscheduler.triggers.cron', 'requests', 'zipfile', 'shutil']
+hiddenimports = ['uvicorn', 'uvicorn.logging', 'uvicorn.loops', 'uvicorn.loops.auto', 'uvicorn.protocols', 'uvicorn.protocols.http', 'uvicorn.protocols.http.auto', 'uvicorn.protocols.websockets', 'uvicorn.protocols.websockets.auto', 'uvicorn.lifespan', 'uvicorn.lifespan.on', 'fastapi', 'pydantic', 'pydantic.dataclasses', 'pydantic_core', 'starlette', 'starlette.routing', 'openpyxl', 'openpyxl.styles', 'pandas', 'pandas._libs', 'apscheduler', 'apscheduler.schedulers.background', 'apscheduler.triggers.cron', 'requests', 'httpx', 'h2', 'zipfile', 'shutil', 'main']
 tmp_ret = collect_all('uvicorn')
 datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
 tmp_ret = collect_all('fastapi')
@@ -27,12 +27,14 @@ function Dashboard() {
         checkBackend();
         loadStats();
 
-        // Refresh stats every 30 seconds
-        const interval = setInterval(() => {
-            loadStats();
-        }, 30000);
-
-        return () => clearInterval(interval);
+        // Refresh stats only when the backend reports a relevant change
+        const unsubscribe = api.subscribeEvents((event) => {
+            if (['files_changed', 'scheduler_job', 'settings_changed'].includes(event.type)) {
+                loadStats();
+            }
+        });
+
+        return unsubscribe;
     }, []);
 
     const checkBackend = async () => {
@@ -25,6 +25,7 @@ function Downloads() {
     const [downloadedFiles, setDownloadedFiles] = useState([]);
     const [processedFiles, setProcessedFiles] = useState([]);
     const [loadingFiles, setLoadingFiles] = useState(false);
+    const [bulkDownloading, setBulkDownloading] = useState(false);
     const [activeTab, setActiveTab] = useState('download'); // download, downloaded, processed
 
     const jobTypeOptions = [
@@ -109,6 +110,39 @@ function Downloads() {
         }
     };
 
+    const handleBulkDownload = async (files, type) => {
+        setBulkDownloading(true);
+        try {
+            // Server streams every file into one zip
+            const response = await api.downloadFiles(type, files.map(file => file.name));
+            const url = window.URL.createObjectURL(new Blob([response.data], { type: 'application/zip' }));
+            const link = document.createElement('a');
+            link.href = url;
+            link.setAttribute('download', `HomeStock_${type}_files.zip`);
+            document.body.appendChild(link);
+            link.click();
+            link.remove();
+            window.URL.revokeObjectURL(url);
+        } catch (error) {
+            console.error('Failed to download files:', error);
+            alert('Failed to download files');
+        } finally {
+            setBulkDownloading(false);
+        }
+    };
+
+    const renderBulkDownloadButton = (files, type) => (
+        <button
+            onClick={() => handleBulkDownload(files, type)}
+            disabled={bulkDownloading || files.length === 0}
+            className="bg-slate-50 text-slate-700 hover:bg-slate-100 disabled:opacity-50 disabled:cursor-not-allowed rounded-xl font-semibold transition-all flex items-center"
+            style={{ gap: '8px', paddingLeft: '16px', paddingRight: '16px', paddingTop: '10px', paddingBottom: '10px' }}
+        >
+            {bulkDownloading ? <Loader2 size={16} className="animate-spin" /> : <Download size={16} />}
+            Download All
+        </button>
+    );
+
     const handleFileDelete = async (filename, type) => {
         if (!window.confirm(`Are you sure you want to delete ${filename}?`)) {
             return;
@@ -462,14 +496,17 @@ function Downloads() {
                                     {downloadedFiles.length} file{downloadedFiles.length !== 1 ? 's' : ''} in downloads directory
                                 </p>
                             </div>
-                            <button
-                                onClick={loadFiles}
-                                className="bg-blue-50 text-blue-600 hover:bg-blue-100 rounded-xl font-semibold transition-all flex items-center"
-                                style={{ gap: '8px', paddingLeft: '16px', paddingRight: '16px', paddingTop: '10px', paddingBottom: '10px' }}
-                            >
-                                <RefreshCw size={16} />
-                                Refresh
-                            </button>
+                            <div className="flex items-center" style={{ gap: '8px' }}>
+                                {renderBulkDownloadButton(downloadedFiles, 'downloaded')}
+                                <button
+                                    onClick={loadFiles}
+                                    className="bg-blue-50 text-blue-600 hover:bg-blue-100 rounded-xl font-semibold transition-all flex items-center"
+                                    style={{ gap: '8px', paddingLeft: '16px', paddingRight: '16px', paddingTop: '10px', paddingBottom: '10px' }}
+                                >
+                                    <RefreshCw size={16} />
+                                    Refresh
+                                </button>
+                            </div>
                         </div>
                         {renderFilesList(downloadedFiles, 'downloaded')}
                     </div>
@@ -485,14 +522,17 @@ function Downloads() {
                                     {processedFiles.length} file{processedFiles.length !== 1 ? 's' : ''} in processed directory
                                 </p>
                             </div>
-                            <button
-                                onClick={loadFiles}
-                                className="bg-purple-50 text-purple-600 hover:bg-purple-100 rounded-xl font-semibold transition-all flex items-center"
-                                style={{ gap: '8px', paddingLeft: '16px', paddingRight: '16px', paddingTop: '10px', paddingBottom: '10px' }}
-                            >
-                                <RefreshCw size={16} />
-                                Refresh
-                            </button>
+                            <div className="flex items-center" style={{ gap: '8px' }}>
+                                {renderBulkDownloadButton(processedFiles, 'processed')}
+                                <button
+                                    onClick={loadFiles}
+                                    className="bg-purple-50 text-purple-600 hover:bg-purple-100 rounded-xl font-semibold transition-all flex items-center"
+                                    style={{ gap: '8px', paddingLeft: '16px', paddingRight: '16px', paddingTop: '10px', paddingBottom: '10px' }}
+                                >
+                                    <RefreshCw size={16} />
+                                    Refresh
+                                </button>
+                            </div>
                         </div>
                         {renderFilesList(processedFiles, 'processed')}
                     </div>
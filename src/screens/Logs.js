@@ -16,6 +16,8 @@ import {
     ArrowUp
 } from 'lucide-react';
 
+const MAX_LIVE_LOGS = 500;
+
 function Logs() {
     const [logs, setLogs] = useState([]);
     const [loading, setLoading] = useState(false);
@@ -45,16 +47,18 @@ function Logs() {
         fetchLogs();
     }, [fetchLogs]);
 
-    // Auto-refresh every 3 seconds when enabled
+    // Stream new log lines from the backend when live mode is enabled
     useEffect(() => {
         if (!autoRefresh) return;
 
-        const intervalId = setInterval(() => {
-            fetchLogs();
-        }, 15000);
+        const unsubscribe = api.subscribeEvents((event) => {
+            if (event.type === 'log') {
+                setLogs(prev => [...prev, event.line].slice(-MAX_LIVE_LOGS));
+            }
+        });
 
-        return () => clearInterval(intervalId);
-    }, [autoRefresh, fetchLogs]); // Added fetchLogs to dependencies
+        return unsubscribe;
+    }, [autoRefresh]);
 
     // Auto-scroll when logs update
     useEffect(() => {
@@ -162,7 +166,7 @@ function Logs() {
                             Application logs and activity history
                             {autoRefresh && (
                                 <span className="text-xs bg-green-100 text-green-700 px-2 py-1 rounded-full font-semibold">
-                                    ● Auto-refreshing (15s)
+                                    ● Live
                                 </span>
                             )}
                         </p>
@@ -302,7 +306,7 @@ function Logs() {
                         style={{ gap: '6px', paddingLeft: '12px', paddingRight: '12px', paddingTop: '8px', paddingBottom: '8px' }}
                     >
                         <RefreshCw size={14} className={autoRefresh ? 'animate-spin' : ''} />
-                        Auto-refresh (15s)
+                        Live updates
                     </button>
                 </div>
             </div>
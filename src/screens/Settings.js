@@ -15,7 +15,9 @@ import {
     PlayCircle,
     PauseCircle,
     Info,
-    AlertTriangle
+    AlertTriangle,
+    Server,
+    KeyRound
 } from 'lucide-react';
 
 
@@ -32,6 +34,9 @@ function Settings() {
     const [hasChanges, setHasChanges] = useState(false);
     const [originalSettings, setOriginalSettings] = useState(null);
     const [schedulerStatus, setSchedulerStatus] = useState(null);
+    const [connection, setConnection] = useState(() => api.getConnection());
+    const [connectionMessage, setConnectionMessage] = useState(null);
+    const [testingConnection, setTestingConnection] = useState(false);
 
 
     useEffect(() => {
@@ -123,6 +128,37 @@ function Settings() {
     };
 
 
+    const handleSaveConnection = async () => {
+        setTestingConnection(true);
+        setConnectionMessage(null);
+        const previous = api.getConnection();
+
+        try {
+            api.saveConnection(connection);
+            // /api/settings needs the token in server mode, so it checks both URL and token
+            await api.getSettings();
+            // Reload so every screen and the live event stream use the new backend
+            window.location.reload();
+        } catch (error) {
+            api.saveConnection(previous);
+            setConnectionMessage({
+                type: 'error',
+                text: error.response && error.response.status === 401
+                    ? 'Server rejected the API token'
+                    : 'Could not reach the backend at this URL'
+            });
+        } finally {
+            setTestingConnection(false);
+        }
+    };
+
+
+    const handleResetConnection = () => {
+        api.resetConnection();
+        window.location.reload();
+    };
+
+
     const resetSettings = () => {
         if (window.confirm('Are you sure you want to reset to saved settings?')) {
             setSettings(originalSettings);
@@ -462,6 +498,105 @@ function Settings() {
                 </div>
 
 
+                {/* Backend Connection Card */}
+                <div className="bg-white rounded-2xl shadow-xl border border-slate-200 overflow-hidden" style={{ marginTop: '24px' }}>
+                    <div style={{ padding: '32px', display: 'flex', flexDirection: 'column', gap: '16px' }}>
+                        <div className="flex items-center" style={{ gap: '8px', marginBottom: '16px' }}>
+                            <Server size={18} className="text-slate-600" />
+                            <h3 className="text-lg font-semibold text-slate-800">Backend Connection</h3>
+                        </div>
+
+
+                        {/* Server URL */}
+                        <div style={{ display: 'flex', flexDirection: 'column', gap: '8px' }}>
+                            <label className="text-sm font-semibold text-slate-700 flex items-center" style={{ gap: '8px' }}>
+                                <Server size={16} className="text-blue-500" />
+                                Server URL
+                            </label>
+                            <div className="relative">
+                                <input
+                                    type="text"
+                                    value={connection.serverUrl}
+                                    onChange={(e) => setConnection({ ...connection, serverUrl: e.target.value })}
+                                    className="w-full border-2 border-slate-200 rounded-xl focus:ring-2 focus:ring-blue-500 focus:border-blue-500 transition-all font-mono text-sm text-slate-700"
+                                    style={{ paddingLeft: '44px', paddingRight: '16px', paddingTop: '14px', paddingBottom: '14px' }}
+                                    placeholder="e.g., http://192.168.1.20:8000"
+                                />
+                                <Server size={16} className="absolute top-1/2 -translate-y-1/2 text-slate-400" style={{ left: '16px' }} />
+                            </div>
+                            <p className="text-xs text-slate-500" style={{ marginLeft: '4px' }}>
+                                Leave as http://127.0.0.1:8000 to use this computer's backend
+                            </p>
+                        </div>
+
+
+                        {/* API Token */}
+                        <div style={{ display: 'flex', flexDirection: 'column', gap: '8px' }}>
+                            <label className="text-sm font-semibold text-slate-700 flex items-center" style={{ gap: '8px' }}>
+                                <KeyRound size={16} className="text-purple-500" />
+                                API Token
+                            </label>
+                            <div className="relative">
+                                <input
+                                    type="password"
+                                    value={connection.apiToken}
+                                    onChange={(e) => setConnection({ ...connection, apiToken: e.target.value })}
+                                    className="w-full border-2 border-slate-200 rounded-xl focus:ring-2 focus:ring-purple-500 focus:border-purple-500 transition-all font-mono text-sm text-slate-700"
+                                    style={{ paddingLeft: '44px', paddingRight: '16px', paddingTop: '14px', paddingBottom: '14px' }}
+                                    placeholder="Only needed for a shared server"
+                                />
+                                <KeyRound size={16} className="absolute top-1/2 -translate-y-1/2 text-slate-400" style={{ left: '16px' }} />
+                            </div>
+                            <p className="text-xs text-slate-500" style={{ marginLeft: '4px' }}>
+                                Token printed by the shared server when it starts (python main.py --server)
+                            </p>
+                        </div>
+
+
+                        <div className="flex" style={{ gap: '12px', paddingTop: '16px' }}>
+                            <button
+                                onClick={handleSaveConnection}
+                                disabled={testingConnection}
+                                className="flex-1 flex items-center justify-center bg-linear-to-r from-blue-600 to-blue-500 text-white rounded-xl font-semibold hover:from-blue-700 hover:to-blue-600 disabled:from-slate-300 disabled:to-slate-300 disabled:cursor-not-allowed transition-all shadow-lg hover:shadow-xl disabled:shadow-none"
+                                style={{ gap: '8px', paddingTop: '16px', paddingBottom: '16px' }}
+                            >
+                                {testingConnection ? (
+                                    <>
+                                        <Loader2 size={20} className="animate-spin" />
+                                        <span>Connecting...</span>
+                                    </>
+                                ) : (
+                                    <>
+                                        <Save size={20} />
+                                        <span>Test & Save Connection</span>
+                                    </>
+                                )}
+                            </button>
+                            <button
+                                onClick={handleResetConnection}
+                                disabled={testingConnection || api.getConnection().isDefault}
+                                className="bg-white border-2 border-slate-200 text-slate-700 rounded-xl font-semibold hover:bg-slate-50 hover:border-slate-300 disabled:opacity-50 disabled:cursor-not-allowed transition-all"
+                                style={{ paddingLeft: '24px', paddingRight: '24px', paddingTop: '16px', paddingBottom: '16px' }}
+                            >
+                                Use Local
+                            </button>
+                        </div>
+
+
+                        {connectionMessage && (
+                            <div className="rounded-xl border-2 bg-linear-to-br from-red-50 to-rose-50 border-red-200" style={{ padding: '16px' }}>
+                                <div className="flex items-center" style={{ gap: '12px' }}>
+                                    <div className="rounded-lg bg-red-100" style={{ padding: '8px' }}>
+                                        <XCircle className="text-red-600" size={20} />
+                                    </div>
+                                    <p className="font-semibold text-red-800">{connectionMessage.text}</p>
+                                </div>
+                            </div>
+                        )}
+                    </div>
+                </div>
+
+
                 {/* Info Card */}
                 <div className="bg-linear-to-r from-slate-800 to-slate-900 rounded-2xl shadow-lg border border-slate-700"
                     style={{ marginTop: '24px', padding: '24px' }}>
@@ -1,20 +1,41 @@
 import axios from 'axios';
 
-const API_BASE_URL = 'http://127.0.0.1:8000/api';
+const DEFAULT_SERVER_URL = 'http://127.0.0.1:8000';
+const SERVER_URL_KEY = 'homestockServerUrl';
+const API_TOKEN_KEY = 'homestockApiToken';
+
+// Backend this client talks to: the bundled local backend by default, or a
+// shared server-mode backend configured on the Settings screen
+let serverUrl = window.localStorage.getItem(SERVER_URL_KEY) || DEFAULT_SERVER_URL;
+let apiToken = window.localStorage.getItem(API_TOKEN_KEY) || '';
+
+// Clients read the connection on every request so changes apply without a reload
+const withConnection = (client, path) => {
+    client.interceptors.request.use((config) => {
+        config.baseURL = `${serverUrl}${path}`;
+        if (apiToken) {
+            config.headers.Authorization = `Bearer ${apiToken}`;
+        }
+        return config;
+    });
+    return client;
+};
 
-const apiClient = axios.create({
-    baseURL: API_BASE_URL,
+const apiClient = withConnection(axios.create({
     timeout: 30000,
     headers: {
         'Content-Type': 'application/json',
     },
-});
+}), '/api');
+
+// For endpoints given with their full path (e.g. '/api/scheduler/status')
+const serverClient = withConnection(axios.create(), '');
 
 export const api = {
     // Test connection
     testConnection: async () => {
         try {
-            const response = await axios.get('http://127.0.0.1:8000');
+            const response = await serverClient.get('/', { timeout: 30000 });
             return response.data;
         } catch (error) {
             throw new Error('Backend not responding');
@@ -31,6 +52,52 @@ export const api = {
         return await apiClient.post('/process_excel', { file_path: filePath });
     },
 
+    // Live event stream (downloads, processing, scheduler, logs).
+    // Returns an unsubscribe function.
+    subscribeEvents: (onEvent) => {
+        let source = null;
+        let closed = false;
+
+        const connect = async () => {
+            let query = '';
+            if (apiToken) {
+                // EventSource cannot send headers; a short-lived ticket keeps the
+                // token itself out of URLs and server access logs
+                try {
+                    const response = await apiClient.post('/events/ticket');
+                    query = `?ticket=${encodeURIComponent(response.data.ticket)}`;
+                } catch (error) {
+                    console.error('Failed to get event stream ticket:', error);
+                    if (!closed) setTimeout(connect, 5000);
+                    return;
+                }
+            }
+            if (closed) return;
+
+            source = new EventSource(`${serverUrl}/api/events${query}`);
+            source.onmessage = (message) => {
+                try {
+                    onEvent(JSON.parse(message.data));
+                } catch (error) {
+                    console.error('Invalid event payload:', error);
+                }
+            };
+            source.onerror = () => {
+                // A reconnect with an expired ticket is rejected and the browser
+                // gives up; start again with a fresh ticket
+                if (source.readyState === EventSource.CLOSED && !closed) {
+                    setTimeout(connect, 5000);
+                }
+            };
+        };
+
+        connect();
+        return () => {
+            closed = true;
+            if (source) source.close();
+        };
+    },
+
     // Logs
     getLogs: async () => {
         return await apiClient.get('/logs');
@@ -56,7 +123,7 @@ export const api = {
 
     // Generic GET method for custom endpoints
     get: async (endpoint, config) => {
-        return await axios.get(`http://127.0.0.1:8000${endpoint}`, {
+        return await serverClient.get(endpoint, {
             ...config,
             timeout: 30000
         });
@@ -64,14 +131,14 @@ export const api = {
 
     // Generic POST method
     post: async (endpoint, data) => {
-        return await axios.post(`http://127.0.0.1:8000${endpoint}`, data, {
+        return await serverClient.post(endpoint, data, {
             timeout: 30000
         });
     },
 
     // Generic DELETE method for custom endpoints
     delete: async (endpoint) => {
-        return await axios.delete(`http://127.0.0.1:8000${endpoint}`, {
+        return await serverClient.delete(endpoint, {
             timeout: 30000
         });
     },
@@ -86,8 +153,8 @@ export const api = {
     },
 
     downloadFile: async (fileType, filename) => {
-        return await axios.get(
-            `http://127.0.0.1:8000/api/files/download/${fileType}/${filename}`,
+        return await apiClient.get(
+            `/files/download/${fileType}/${filename}`,
             {
                 responseType: 'blob',
                 timeout: 60000
@@ -95,9 +162,20 @@ export const api = {
         );
     },
 
+    downloadFiles: async (fileType, filenames) => {
+        return await apiClient.post(
+            '/files/bulk_download',
+            { file_type: fileType, filenames },
+            {
+                responseType: 'blob',
+                timeout: 300000
+            }
+        );
+    },
+
     deleteFile: async (fileType, filename) => {
-        return await axios.delete(
-            `http://127.0.0.1:8000/api/files/${fileType}/${filename}`,
+        return await apiClient.delete(
+            `/files/${fileType}/${filename}`,
             {
                 timeout: 30000
             }
@@ -106,6 +184,27 @@ export const api = {
 
     getFilesStats: async () => {
         return await apiClient.get('/files/stats');
+    },
+
+    // Backend connection (stored per client, not in the backend's settings.json)
+    getConnection: () => ({
+        serverUrl,
+        apiToken,
+        isDefault: serverUrl === DEFAULT_SERVER_URL,
+    }),
+
+    saveConnection: ({ serverUrl: url, apiToken: token }) => {
+        serverUrl = (url || '').trim().replace(/\/+$/, '') || DEFAULT_SERVER_URL;
+        apiToken = (token || '').trim();
+        window.localStorage.setItem(SERVER_URL_KEY, serverUrl);
+        window.localStorage.setItem(API_TOKEN_KEY, apiToken);
+    },
+
+    resetConnection: () => {
+        serverUrl = DEFAULT_SERVER_URL;
+        apiToken = '';
+        window.localStorage.removeItem(SERVER_URL_KEY);
+        window.localStorage.removeItem(API_TOKEN_KEY);
     }
 };
 